@@ -0,0 +1,191 @@
+"""Benchmarks of transforming and mining synthetic databases.
+
+Run from the repository root, e.g.
+
+    python -m benchmarks.run --sizes 1000 10000 --output results.json
+
+Every scenario is run on databases of each size, reporting the best wall
+time of the repeats, the peak memory traced by tracemalloc in a separate
+run, and the number of patterns mined, as JSON.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from math import inf
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas
+
+from gisp.gisp import Gisp
+from gisp.itemize import Log2
+
+from .synthetic import INTERVALS, generate
+
+
+# scenario name to a function from (sequences, settings) to a function
+# running the benchmarked code on prepared input, which returns the number
+# of patterns mined if any
+Scenario = Callable[[List, Dict[str, Any]], Callable[[], Any]]
+
+
+def gisp(settings: Dict[str, Any], **options: Any) -> Gisp:
+    return Gisp(
+        Log2(60), settings['min_support'], min_interval=0,
+        max_interval=settings['max_interval'], min_whole_interval=0,
+        max_whole_interval=settings['max_whole_interval'], **options)
+
+
+def transform(
+        sequences: List, settings: Dict[str, Any]) -> Callable[[], Any]:
+    def run() -> None:
+        Gisp.transform(sequences)
+    return run
+
+
+def encode(
+        sequences: List, settings: Dict[str, Any]) -> Callable[[], Any]:
+    def run() -> None:
+        Gisp.transform(sequences, encode=True)
+    return run
+
+
+def mine_dataframe(
+        sequences: List, settings: Dict[str, Any]) -> Callable[[], Any]:
+    isdb = Gisp.transform(sequences)
+    return lambda: len(gisp(settings).mine(isdb))
+
+
+def mine_engine(
+        sequences: List, settings: Dict[str, Any]) -> Callable[[], Any]:
+    isdb = Gisp.transform(sequences, encode=True)
+    return lambda: len(gisp(settings).mine(isdb))
+
+
+def mine_pseudo(
+        sequences: List, settings: Dict[str, Any]) -> Callable[[], Any]:
+    isdb = Gisp.transform(sequences, encode=True)
+    return lambda: len(gisp(settings, pseudo_projection=True).mine(isdb))
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    'transform': transform,
+    'encode': encode,
+    'mine_dataframe': mine_dataframe,
+    'mine_engine': mine_engine,
+    'mine_pseudo': mine_pseudo,
+}
+
+# the DataFrame implementation copies every postfix, so it is only run on
+# small databases unless asked for
+SLOW = {'mine_dataframe': 2000}
+
+
+def measure(run: Callable[[], Any], repeat: int, memory: bool
+            ) -> Dict[str, Any]:
+    """Run a scenario, returning its best time, peak memory and result."""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        seconds.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {
+        'seconds': min(seconds),
+        'all_seconds': seconds,
+        'peak_bytes': peak,
+        'n_patterns': result,
+    }
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--scenarios', nargs='+', choices=list(SCENARIOS),
+        default=list(SCENARIOS))
+    parser.add_argument(
+        '--sizes', nargs='+', type=int, default=[1000, 10000, 100000],
+        help='numbers of sequences')
+    parser.add_argument('--length', type=float, default=10)
+    parser.add_argument('--itemset-size', type=float, default=2)
+    parser.add_argument('--n-items', type=int, default=100)
+    parser.add_argument('--skew', type=float, default=1.0)
+    parser.add_argument('--interval', choices=INTERVALS, default='exponential')
+    parser.add_argument('--scale', type=float, default=3600)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--min-support', type=float, default=0.05,
+        help='minimal support relative to the number of sequences')
+    parser.add_argument('--max-interval', type=float, default=inf)
+    parser.add_argument('--max-whole-interval', type=float, default=inf)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--no-memory', action='store_true',
+        help='skip the traced run measuring peak memory')
+    parser.add_argument(
+        '--all-sizes', action='store_true',
+        help='run slow scenarios on every size')
+    parser.add_argument('--output', help='JSON file, defaults to stdout')
+    args = parser.parse_args(argv)
+
+    generator = dict(
+        length=args.length, itemset_size=args.itemset_size,
+        n_items=args.n_items, skew=args.skew, interval=args.interval,
+        scale=args.scale, seed=args.seed)
+    results = []
+    for size in args.sizes:
+        sequences = generate(size, **generator)
+        settings = dict(
+            min_support=max(1, int(args.min_support * size)),
+            max_interval=args.max_interval,
+            max_whole_interval=args.max_whole_interval)
+        for name in args.scenarios:
+            if not args.all_sizes and size > SLOW.get(name, inf):
+                continue
+            run = SCENARIOS[name](sequences, settings)
+            result = measure(run, args.repeat, not args.no_memory)
+            results.append({
+                'scenario': name, 'n_sequences': size,
+                'n_rows': sum(len(items) for sequence in sequences
+                              for _, items in sequence),
+                # open bounds are null, since inf is not valid JSON
+                **{key: None if value == inf else value
+                   for key, value in settings.items()},
+                **result})
+            print(f'{name} {size}: {result["seconds"]:.3f}s',
+                  file=sys.stderr)
+
+    report = {
+        'meta': {
+            'time': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pandas.__version__,
+            'generator': generator,
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text)
+    else:
+        print(text)
+    return report
+
+
+if __name__ == '__main__':
+    main()
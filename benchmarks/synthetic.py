@@ -0,0 +1,70 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+INTERVALS = ['exponential', 'uniform', 'lognormal', 'constant']
+
+
+def generate(
+        n_sequences: int, length: float = 10, itemset_size: float = 2,
+        n_items: int = 100, skew: float = 1.0,
+        interval: str = 'exponential', scale: float = 3600, seed: int = 0
+) -> List[List[Tuple[int, List[str]]]]:
+    """Generate random interval-extended sequences.
+
+    Args:
+        n_sequences: Number of sequences.
+        length: Mean number of itemsets of a sequence, which is
+            1 + Poisson(length - 1).
+        itemset_size: Mean number of draws of items of an itemset, which is
+            1 + Poisson(itemset_size - 1). Items are drawn with replacement,
+            so an itemset may be smaller.
+        n_items: Size of the item vocabulary, whose items are 'i0', 'i1', ...
+        skew: Exponent of the Zipf distribution of items, where the k-th
+            item is drawn with probability proportional to 1 / k ** skew,
+            and 0 is uniform.
+        interval: Distribution of the interval between adjacent itemsets,
+            one of 'exponential', 'uniform' (in [0, 2 * scale]),
+            'lognormal' (of median scale) and 'constant'.
+        scale: Mean interval between adjacent itemsets.
+        seed: Seed of the random generator.
+
+    Returns:
+        Sequences of (interval, items) as taken by `Gisp.transform`.
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f'interval should be one of {INTERVALS}')
+    rng = np.random.default_rng(seed)
+
+    lengths = 1 + rng.poisson(max(length - 1, 0), n_sequences)
+    n_itemsets = int(lengths.sum())
+    sizes = 1 + rng.poisson(max(itemset_size - 1, 0), n_itemsets)
+
+    weights = 1 / np.arange(1, n_items + 1) ** skew
+    items = rng.choice(n_items, int(sizes.sum()), p=weights / weights.sum())
+
+    if interval == 'exponential':
+        gaps = rng.exponential(scale, n_itemsets)
+    elif interval == 'uniform':
+        gaps = rng.uniform(0, 2 * scale, n_itemsets)
+    elif interval == 'lognormal':
+        gaps = rng.lognormal(np.log(scale), 1, n_itemsets)
+    else:
+        gaps = np.full(n_itemsets, scale)
+    # the first itemset of every sequence is at 0
+    firsts = np.cumsum(lengths) - lengths
+    gaps[firsts] = 0
+    intervals = np.cumsum(gaps.round().astype(np.int64))
+    intervals -= np.repeat(intervals[firsts], lengths)
+
+    labels = [f'i{k}' for k in range(n_items)]
+    itemsets = np.split(items, np.cumsum(sizes)[:-1])
+    sequences, i = [], 0
+    for n in lengths.tolist():
+        sequences.append([
+            (t, sorted({labels[k] for k in itemset.tolist()}))
+            for t, itemset in zip(
+                intervals[i:i + n].tolist(), itemsets[i:i + n])])
+        i += n
+    return sequences
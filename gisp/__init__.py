@@ -0,0 +1,12 @@
+from .cache import PdbCache
+from .gisp import Gisp, Pattern, iter_patterns, mine
+from .isdb import Isdb
+from .itemize import Breakpoints, FixedWidth, Function, Itemizer, Log2
+from .stats import Stats
+from .store import PatternStore
+
+__all__ = [
+    'Gisp', 'Pattern', 'iter_patterns', 'mine', 'Isdb', 'Itemizer',
+    'FixedWidth', 'Log2', 'Breakpoints', 'Function', 'Stats', 'PdbCache',
+    'PatternStore',
+]
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+
+class PdbCache:
+    # Bounded cache of counted PDBs, shared by mining runs on the same ISDB
+    # with different settings, e.g. sweeping min_support.
+    #
+    # An entry is the PDB of a prefix with supports of all of its extensions
+    # (see `gisp.engine.Node`), keyed by the prefix and the constraints which
+    # shape it: itemize, the interval constraints and pseudo_projection.
+    # Supports are kept whatever min_support is, so a run with another
+    # min_support, top_k, max_length, closed or maximal reuses every entry
+    # of the same constraints, and neither projects nor counts those PDBs
+    # again. Itemize is compared by identity, so runs should pass the same
+    # object, and the ISDB too, since entries point into it and the cache is
+    # cleared when it is used on another ISDB.
+    #
+    # Entries are evicted least recently used first when their arrays would
+    # take more than max_bytes. Hits, misses and evictions are counted for
+    # sizing the budget.
+
+    def __init__(self, max_bytes: int = 256 * 2**20) -> None:
+        """
+        Args:
+            max_bytes: Memory budget of arrays of entries.
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._isdb = None  # the ISDB entries point into
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def bind(self, isdb: Any) -> None:
+        """Use the cache on an ISDB, dropping entries of any other."""
+        if isdb is not self._isdb:
+            self.clear()
+            self._isdb = isdb
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Return the entry of key, None if it is not cached."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, entry: Any, nbytes: int) -> None:
+        """Cache an entry taking nbytes, unless it exceeds the budget."""
+        if nbytes > self.max_bytes:
+            return
+        if key in self._entries:
+            self.nbytes -= self._sizes.pop(key)
+            del self._entries[key]
+        while self.nbytes + nbytes > self.max_bytes:
+            evicted, _ = self._entries.popitem(last=False)
+            self.nbytes -= self._sizes.pop(evicted)
+            self.evictions += 1
+        self._entries[key] = entry
+        self._sizes[key] = nbytes
+        self.nbytes += nbytes
+
+    def summary(self) -> Dict[str, Any]:
+        """Return counters as a structure of plain values."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'nbytes': self.nbytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
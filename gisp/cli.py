@@ -0,0 +1,238 @@
+"""Command-line miner of many databases, e.g.
+
+    python -m gisp tenants/*.jsonl --itemize log2:60 --min-support 5 \\
+        --max-interval 86400 --jobs 8 --output-dir patterns
+
+Every input file is a database mined on its own, by a pool of worker
+processes taking files in chunks, so that thousands of small databases are
+mined at the throughput of all CPUs. Patterns of a file are streamed as they
+are found to a JSONL file of the same name in the output directory, one
+{"support": ..., "sequence": [[interval, item], ...]} per line, and a line
+of the output path and the number of patterns is printed per file.
+
+Inputs are read by their suffix:
+
+- JSONL (.jsonl, .json) has a sequence per line as
+  [[interval, [item, ...]], ...], whose sid is the line number.
+- CSV (.csv) and Parquet (.parquet, .pq) have rows of columns sid, item and
+  interval. Parquet needs pyarrow.
+
+A --min-support below 1 is a fraction of the non-empty sequences of each
+file: blank JSONL lines and empty sequences are not counted, as they cannot
+support any pattern and CSV and Parquet files cannot hold them.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+from math import ceil, inf
+from typing import Any, Dict, List, Tuple, Union
+
+from .gisp import Gisp
+from .isdb import Isdb, IsdbBuilder
+from .itemize import Breakpoints, FixedWidth, Itemizer, Log2
+
+FORMATS = {
+    '.jsonl': 'jsonl', '.json': 'jsonl', '.csv': 'csv', '.parquet': 'parquet',
+    '.pq': 'parquet',
+}
+
+# rows of a CSV file read at once
+CSV_CHUNK_ROWS = 1 << 16
+
+
+def parse_itemizer(spec: str) -> Itemizer:
+    """Build an itemizer from a spec, one of fixed:WIDTH, log2[:WIDTH] and
+    breakpoints:B1,B2,..."""
+    name, _, argument = spec.partition(':')
+    try:
+        if name == 'fixed':
+            return FixedWidth(number(argument))
+        if name == 'log2':
+            return Log2(number(argument) if argument else 1)
+        if name == 'breakpoints':
+            return Breakpoints([number(b) for b in argument.split(',')])
+    except ValueError:
+        pass
+    raise ValueError(f'invalid itemizer {spec}')
+
+
+def number(text: str) -> Any:
+    """Parse an int, or a float if it is not one."""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def support(text: str) -> Union[int, float]:
+    """Parse a minimal support, either a number of sequences or a fraction
+    of them below 1."""
+    value = number(text)
+    if 0 < value < 1:
+        return value
+    if value >= 1 and (isinstance(value, int) or value.is_integer()):
+        return int(value)
+    raise argparse.ArgumentTypeError(
+        f'{text} is neither an integer of at least 1 nor a fraction in '
+        f'(0, 1)')
+
+
+def positive(text: str) -> int:
+    """Parse an integer of at least 1, e.g. a number of processes."""
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value >= 1:
+        return value
+    raise argparse.ArgumentTypeError(f'{text} is not an integer of at least 1')
+
+
+def read(path: str, format: str = None) -> Isdb:
+    """Read a database in the format of its suffix unless given."""
+    if format is None:
+        format = FORMATS.get(os.path.splitext(path)[1].lower())
+        if format is None:
+            raise ValueError(f'unknown format of {path}')
+    if format == 'jsonl':
+        return read_jsonl(path)
+    if format == 'csv':
+        return read_csv(path)
+    if format == 'parquet':
+        return read_parquet(path)
+    raise ValueError(f'unknown format {format}')
+
+
+def read_jsonl(path: str) -> Isdb:
+    builder = IsdbBuilder()
+    with open(path) as file:
+        for sid, line in enumerate(file):
+            if line.strip():
+                builder.add_sequence(json.loads(line), sid)
+    return builder.build()
+
+
+def read_csv(path: str) -> Isdb:
+    builder = IsdbBuilder()
+    with open(path, newline='') as file:
+        rows = csv.DictReader(file)
+        for chunk in iter(lambda: list(islice(rows, CSV_CHUNK_ROWS)), []):
+            builder.add_rows(
+                [int(row['sid']) for row in chunk],
+                [row['item'] for row in chunk],
+                [number(row['interval']) for row in chunk])
+    return builder.build()
+
+
+def read_parquet(path: str) -> Isdb:
+    from pyarrow.parquet import ParquetFile
+    return Isdb.from_batches(ParquetFile(path).iter_batches(
+        columns=['sid', 'item', 'interval']))
+
+
+def output_path(path: str, output_dir: str) -> str:
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(output_dir, f'{name}.patterns.jsonl')
+
+
+def mine_file(
+        path: str, output: str, itemize: Itemizer,
+        min_support: Union[int, float],
+        options: Dict[str, Any], format: str = None
+) -> Tuple[int, str]:
+    """Mine a file into output in a worker process.
+
+    Returns:
+        The number of patterns, and an error message if mining failed
+        instead of raising it, so that other files of the batch are mined.
+    """
+    try:
+        isdb = read(path, format)
+        if min_support < 1:
+            # relative to the number of non-empty sequences of this file
+            min_support = max(1, ceil(min_support * isdb.n_sequences))
+        gisp = Gisp(itemize, min_support, **options)
+        count = 0
+        with open(output, 'w') as file:
+            for pattern in gisp.iter_patterns(isdb):
+                file.write(json.dumps({
+                    'support': pattern.support,
+                    'sequence': pattern.sequence}) + '\n')
+                count += 1
+        return count, None
+    except Exception as error:
+        return 0, f'{type(error).__name__}: {error}'
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m gisp', description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help='database files')
+    parser.add_argument(
+        '--format', choices=sorted(set(FORMATS.values())),
+        help='format of every input, by suffix if not given')
+    parser.add_argument(
+        '-o', '--output-dir', default='.',
+        help='directory of pattern files, named INPUT.patterns.jsonl')
+    parser.add_argument(
+        '--itemize', type=parse_itemizer, default='log2',
+        help='fixed:WIDTH, log2[:WIDTH] or breakpoints:B1,B2,...')
+    parser.add_argument(
+        '--min-support', type=support, required=True,
+        help='minimal number of sequences, or a fraction of the non-empty '
+             'sequences of each file if below 1')
+    for name in ['min-interval', 'min-whole-interval']:
+        parser.add_argument(f'--{name}', type=number, default=0)
+    for name in ['max-interval', 'max-whole-interval']:
+        parser.add_argument(f'--{name}', type=number, default=inf)
+    parser.add_argument('--max-length', type=positive)
+    parser.add_argument('--top-k', type=positive)
+    parser.add_argument('--closed', action='store_true')
+    parser.add_argument('--maximal', action='store_true')
+    parser.add_argument('--pseudo-projection', action='store_true')
+    parser.add_argument(
+        '-j', '--jobs', type=positive, default=os.cpu_count() or 1,
+        help='number of worker processes, 1 to mine in this process')
+    args = parser.parse_args(argv)
+
+    options = dict(
+        min_interval=args.min_interval, max_interval=args.max_interval,
+        min_whole_interval=args.min_whole_interval,
+        max_whole_interval=args.max_whole_interval,
+        max_length=args.max_length, top_k=args.top_k, closed=args.closed,
+        maximal=args.maximal, pseudo_projection=args.pseudo_projection)
+    os.makedirs(args.output_dir, exist_ok=True)
+    outputs = [output_path(path, args.output_dir) for path in args.inputs]
+    if len(set(outputs)) < len(outputs):
+        parser.error('inputs of the same name would share an output file')
+    tasks = (
+        args.inputs, outputs, repeat(args.itemize), repeat(args.min_support),
+        repeat(options), repeat(args.format))
+
+    if args.jobs == 1 or len(args.inputs) == 1:
+        failed = report(outputs, map(mine_file, *tasks))
+    else:
+        # chunks of files amortize shipping tasks among small databases
+        chunksize = max(1, len(args.inputs) // (4 * args.jobs))
+        with ProcessPoolExecutor(args.jobs) as executor:
+            failed = report(outputs, executor.map(
+                mine_file, *tasks, chunksize=chunksize))
+    return 1 if failed else 0
+
+
+def report(outputs: List[str], results: Any) -> int:
+    """Print results of files as they complete, returning the number of
+    files failed."""
+    failed = 0
+    for output, (count, error) in zip(outputs, results):
+        if error is None:
+            print(f'{output}\t{count}')
+        else:
+            print(f'{output}\t{error}', file=sys.stderr)
+            failed += 1
+    return failed
@@ -0,0 +1,331 @@
+import heapq
+import os
+from abc import ABC, abstractmethod
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from typing import Any, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+from numpy import ndarray
+
+from .engine import Engine, Node, count_distinct, select_top
+from .gisp import Gisp, Pattern
+from .isdb import Isdb
+
+
+# an element of a path, that is (itemized_interval, item code)
+Element = Tuple[int, int]
+
+
+class Partition:
+    # A partition of the ISDB by sid, mined by a worker on behalf of the
+    # driver of `iter_patterns`.
+    #
+    # Supports are numbers of distinct sequences, and sequences of different
+    # partitions are disjoint, so supports of the whole ISDB are sums of the
+    # supports counted in every partition. The worker counts every extension
+    # of a path, whether it is frequent or not, and the driver sums them up
+    # to decide which extensions are globally frequent before any partition
+    # projects them. PDBs along the path last requested are kept (see
+    # `gisp.engine.Node`), so a depth-first search projects every PDB once.
+
+    def __init__(self, gisp: Gisp, isdb: Union[Isdb, str]) -> None:
+        """
+        Args:
+            gisp: Settings of mining.
+            isdb: The partition, or the path of a file written by
+                `Isdb.save`, e.g. on the node running this worker.
+        """
+        if isinstance(isdb, str):
+            isdb = Isdb.load(isdb)
+        self._gisp = gisp
+        self._engine = Engine(gisp, isdb, gisp._pseudo_projection)
+        self._path: List[Element] = []
+        self._nodes: List[Node] = []
+
+    def items(self) -> Tuple[ndarray, ndarray]:
+        """Return the item dictionary and the local supports of items."""
+        isdb = self._engine._isdb
+        codes, counts = count_distinct(isdb.seq, isdb.item)
+        supports = np.zeros(len(isdb.items), dtype=np.int64)
+        supports[codes] = counts
+        return isdb.items, supports
+
+    def prune(self, items: ndarray, codes: ndarray) -> None:
+        """Re-encode items by the global dictionary, keeping rows of the
+        frequent items of the codes only."""
+        isdb = self._engine._isdb
+        # both dictionaries are sorted, so rows stay in order
+        recode = np.searchsorted(items, isdb.items).astype(np.int32)
+        isdb = Isdb(
+            isdb.sid, recode[isdb.item], isdb.interval, items,
+            isdb.offsets, isdb.seq, isdb.ends).keep_items(codes)
+        self._engine = Engine(self._gisp, isdb, self._gisp._pseudo_projection)
+        self._path, self._nodes = [], []
+
+    def count(
+            self, path: List[Element]
+    ) -> Tuple[ndarray, ndarray, ndarray, ndarray]:
+        """Count extensions of a path in this partition.
+
+        Returns:
+            Item codes, itemized intervals, supports and supports within
+            min_whole_interval of every extension occurring in the PDB.
+        """
+        common = 0
+        while common < min(len(self._path), len(path)) \
+                and self._path[common] == path[common]:
+            common += 1
+        del self._path[common:], self._nodes[common:]
+        engine = self._engine
+        for element in path[common:]:
+            interval, item = element
+            if self._nodes:
+                parent = self._nodes[-1]
+                code = np.searchsorted(parent.values, interval)
+                known = code < len(parent.values) \
+                    and parent.values[code] == interval
+                # an extension not in the parent projects an empty PDB
+                pdb = engine.project_child(
+                    parent, item * len(parent.values) + code if known else -1)
+            else:
+                pdb = engine.project_item(engine.item_rows(item))
+            self._path.append(element)
+            self._nodes.append(engine.count_node(list(self._path), pdb))
+
+        node = self._nodes[-1]
+        item, code = np.divmod(node.keys, max(len(node.values), 1))
+        return item, node.values[code], node.counts, node.results
+
+    def handle(self, message: Tuple[Any, ...]) -> Any:
+        command, *args = message
+        if command not in ('items', 'prune', 'count'):
+            raise ValueError(f'unknown command {command}')
+        return getattr(self, command)(*args)
+
+
+def serve(connection: Connection) -> None:
+    """Answer requests of a driver until it closes the connection.
+
+    The first request is ('load', gisp, isdb) of a `Partition`, followed by
+    ('items',), ('prune', items, codes) and ('count', path) requests,
+    answered by the same methods of the partition. A connection may be a
+    pipe to a local process, or e.g. `multiprocessing.connection.Client`
+    to a driver on another node. Errors are sent back to be raised by the
+    driver.
+    """
+    partition = None
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        if message[0] == 'close':
+            return
+        try:
+            if message[0] == 'load':
+                partition = Partition(*message[1:])
+                reply = None
+            else:
+                reply = partition.handle(message)
+        except Exception as error:
+            reply = error
+        connection.send(reply)
+
+
+class Transport(ABC):
+    # Carries requests of the driver to the workers of partitions, such as
+    # `serve`, and their replies back. Replies are gathered after every
+    # request is sent, so partitions work at the same time.
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """The number of partitions."""
+
+    @abstractmethod
+    def scatter(self, messages: Sequence[Any]) -> List[Any]:
+        """Send the k-th message to the k-th partition, returning replies in
+        the same order."""
+
+    def broadcast(self, message: Any) -> List[Any]:
+        return self.scatter([message] * len(self))
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> 'Transport':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class ConnectionTransport(Transport):
+    # Transport over `multiprocessing.connection` connections, one per
+    # partition, which may be pipes or sockets to other nodes.
+
+    def __init__(self, connections: Sequence[Connection]) -> None:
+        self._connections = list(connections)
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    def scatter(self, messages: Sequence[Any]) -> List[Any]:
+        for connection, message in zip(self._connections, messages):
+            connection.send(message)
+        replies = [connection.recv() for connection in self._connections]
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+        return replies
+
+    def close(self) -> None:
+        for connection in self._connections:
+            try:
+                connection.send(('close',))
+            except OSError:
+                pass
+            connection.close()
+
+
+class LocalTransport(ConnectionTransport):
+    # A worker process per partition on this machine, connected by pipes.
+
+    def __init__(self, n_partitions: int = None) -> None:
+        """
+        Args:
+            n_partitions: Number of worker processes, defaults to the number
+                of CPUs.
+        """
+        connections, self._processes = [], []
+        for _ in range(n_partitions or os.cpu_count() or 1):
+            connection, worker = Pipe()
+            process = Process(target=serve, args=(worker,), daemon=True)
+            process.start()
+            worker.close()
+            connections.append(connection)
+            self._processes.append(process)
+        super().__init__(connections)
+
+    def close(self) -> None:
+        super().close()
+        for process in self._processes:
+            process.join()
+
+
+def partition(isdb: Isdb, n_partitions: int) -> List[Isdb]:
+    """Split the ISDB by sid modulo n_partitions."""
+    part = isdb.sid % n_partitions
+    return [isdb.take(part == k) for k in range(n_partitions)]
+
+
+def iter_patterns(
+        gisp: Gisp, isdb: Union[Isdb, Sequence[Union[Isdb, str]]],
+        transport: Transport
+) -> Iterator[Pattern]:
+    """Mine partitions of an ISDB through a transport, map/reduce style.
+
+    Patterns are the same as `Gisp.mine` in the same order. Every node of
+    the search is a round trip: partitions count extensions of the pattern
+    (map), the driver sums supports (reduce) and descends into globally
+    frequent extensions, which partitions project on the next request.
+
+    Args:
+        gisp: Settings of mining, where closed and maximal are not
+            supported, and itemize should be picklable.
+        isdb: The ISDB to be partitioned by sid, or its partitions (or paths
+            of their files to be loaded by workers), one per worker.
+        transport: Connections to the workers.
+    """
+    if gisp._closed or gisp._maximal:
+        raise ValueError('closed and maximal are not supported distributed')
+    sources = partition(isdb, len(transport)) if isinstance(isdb, Isdb) \
+        else list(isdb)
+    if len(sources) != len(transport):
+        raise ValueError(
+            f'{len(sources)} partitions for {len(transport)} workers')
+    transport.scatter([('load', gisp, source) for source in sources])
+
+    # merge item dictionaries and supports of items
+    replies = transport.broadcast(('items',))
+    items = np.unique(np.concatenate([labels for labels, _ in replies]))
+    supports = np.zeros(len(items), dtype=np.int64)
+    for labels, counts in replies:
+        supports[np.searchsorted(items, labels)] += counts
+    codes = np.flatnonzero(supports >= gisp._min_support)
+    transport.broadcast(('prune', items, codes))
+
+    patterns = Driver(gisp, items, transport).iter_patterns(codes, supports)
+    if gisp._top_k is not None:
+        patterns = select_top(list(patterns), gisp._top_k)
+    yield from patterns
+
+
+class Driver:
+    # Depth-first search of `iter_patterns` over supports summed up from
+    # partitions, raising the minimal support with top_k as `Engine` does.
+
+    def __init__(
+            self, gisp: Gisp, items: ndarray, transport: Transport) -> None:
+        self._gisp = gisp
+        self._items = items
+        self._transport = transport
+        self._min_support = gisp._min_support  # raised by top_k
+        self._top_supports: List[int] = []  # min-heap of top_k supports
+
+    def found(self, pattern: Pattern) -> Pattern:
+        top_k = self._gisp._top_k
+        if top_k is not None:
+            heapq.heappush(self._top_supports, pattern.support)
+            if len(self._top_supports) > top_k:
+                heapq.heappop(self._top_supports)
+            if len(self._top_supports) == top_k:
+                self._min_support = max(
+                    self._min_support, self._top_supports[0] + 1)
+        return pattern
+
+    def iter_patterns(
+            self, codes: ndarray, supports: ndarray) -> Iterator[Pattern]:
+        gisp = self._gisp
+        for code in codes.tolist():
+            if supports[code] < self._min_support:
+                continue
+            prefix = [(0, self._items[code])]
+            if gisp._min_whole_interval == 0:
+                yield self.found(Pattern(prefix, int(supports[code])))
+            if self.extensible(prefix):
+                yield from self.iter_subpatterns(prefix, [(0, code)])
+
+    def iter_subpatterns(
+            self, prefix: List[Tuple[int, str]], path: List[Element]
+    ) -> Iterator[Pattern]:
+        replies = self._transport.broadcast(('count', path))
+        item, interval, counts, results = (
+            np.concatenate(arrays) for arrays in zip(*replies))
+        if not len(item):
+            return
+
+        # sum supports of the same extension, ordered by (item, interval)
+        order = np.lexsort((interval, item))
+        item, interval, counts, results = (
+            array[order] for array in (item, interval, counts, results))
+        first = np.concatenate(([True], (
+            np.diff(item) != 0) | (np.diff(interval) != 0)))
+        starts = np.flatnonzero(first)
+        counts = np.add.reduceat(counts, starts)
+        results = np.add.reduceat(results, starts)
+
+        for start, count, result in zip(
+                starts.tolist(), counts.tolist(), results.tolist()):
+            if count < self._min_support:
+                continue
+            element = (interval[start].item(), item[start].item())
+            subprefix = prefix + [(element[0], self._items[element[1]])]
+            if result >= self._min_support:
+                yield self.found(Pattern(subprefix, result))
+            if self.extensible(subprefix):
+                yield from self.iter_subpatterns(subprefix, path + [element])
+
+    def extensible(self, prefix: List[Tuple[int, str]]) -> bool:
+        max_length = self._gisp._max_length
+        return max_length is None or len(prefix) < max_length
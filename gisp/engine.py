@@ -0,0 +1,886 @@
+import heapq
+from math import inf
+from time import perf_counter
+from typing import (
+    Any, Dict, Hashable, Iterator, List, NamedTuple, Tuple, Union)
+
+import numpy as np
+from numpy import ndarray
+
+from .cache import PdbCache
+from .gisp import Gisp, Pattern
+from .isdb import Isdb
+from .stats import Stats
+
+
+class Pdb(NamedTuple):
+
+    # PDB of pointers into the ISDB instead of copied rows. Each entry is an
+    # item of some postfix, and postfixes are stored contiguously.
+    row: ndarray  # row of the item in the ISDB
+    base: ndarray  # interval of the last projected item of the postfix
+    head: ndarray  # row of the head item of the postfix in the ISDB
+    end: ndarray  # end position (exclusive) of the postfix in the PDB
+
+
+class Postfixes(NamedTuple):
+
+    # Pseudo-projected PDB. Each postfix is only a record pointing into the
+    # single original ISDB, and intervals of its items are computed on the
+    # fly when the PDB is counted.
+    start: ndarray  # first row of the postfix in the ISDB
+    stop: ndarray  # end row (exclusive) of the postfix in the ISDB
+    base: ndarray  # interval of the last projected item (anchor)
+    head: ndarray  # row of the head item, offsetting whole intervals
+
+
+class Node(NamedTuple):
+
+    # A PDB with every extension counted, which is all the search below its
+    # prefix needs, whatever the minimal support is, so that it can be kept
+    # in a `PdbCache`. Occurrences are the admissible items of the PDB sorted
+    # by extension.
+    pdb: Union[Pdb, Postfixes]
+    rows: int  # number of items of the PDB
+    values: ndarray  # itemized intervals, indexed by extension codes
+    keys: ndarray  # extensions occurring in the PDB in ascending order
+    counts: ndarray  # supports of keys
+    results: ndarray  # supports of keys within min_whole_interval
+    extensions: ndarray  # extension of each occurrence
+    positions: Union[ndarray, None]  # PDB position of each occurrence
+    owners: Union[ndarray, None]  # postfix of each occurrence, if pseudo
+    stops: Union[ndarray, None]  # postfix stops within whole interval, if cut
+    heads: ndarray  # ISDB row of the head of each occurrence
+    tails: ndarray  # ISDB row of each occurrence
+
+
+def head_rows(pdb: Union[Pdb, Postfixes]) -> ndarray:
+    """Return ISDB rows of heads of the items of a PDB."""
+    if isinstance(pdb, Postfixes):
+        return pdb.head[pdb.start < pdb.stop]
+    return pdb.head
+
+
+def stored(node: Node) -> Tuple[Node, int]:
+    """Return a node to be cached and the bytes it holds."""
+    # postfixes sliced from arrays of the parent would keep them alive
+    pdb = type(node.pdb)(*(
+        array if array.base is None else array.copy()
+        for array in node.pdb))
+    node = node._replace(pdb=pdb)
+    nbytes = 0
+    for field in node:
+        if isinstance(field, ndarray):
+            nbytes += field.nbytes
+        elif isinstance(field, tuple):
+            nbytes += sum(array.nbytes for array in field)
+    return node, nbytes
+
+
+def ranges(starts: ndarray, stops: ndarray) -> Tuple[ndarray, ndarray]:
+    """Concatenate ranges [start, stop) and the owner index of each value."""
+    lengths = stops - starts
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    firsts = np.cumsum(lengths) - lengths
+    values = starts[owner] + np.arange(len(owner)) - firsts[owner]
+    return values, owner
+
+
+def search(
+        values: ndarray, starts: ndarray, stops: ndarray, targets: ndarray,
+        side: str = 'left', rows: ndarray = None
+) -> ndarray:
+    """Find where targets would be inserted into sorted ranges of values.
+
+    This is `numpy.searchsorted` of the k-th target in the k-th range
+    [start, stop), by binary search of every range at once, which takes
+    only a logarithmic number of steps of the longest range.
+
+    Args:
+        values: Values which are sorted within every range.
+        starts: First position of each range.
+        stops: End position (exclusive) of each range.
+        targets: Value to search in each range.
+        side: 'left' for the first position of values not less than the
+            target, 'right' for the first position of greater values.
+        rows: Positions of values, where positions index values themselves
+            if not given.
+    """
+    lo = starts.astype(np.int64)
+    hi = stops.astype(np.int64)
+    active = np.flatnonzero(lo < hi)
+    while len(active):
+        mid = (lo[active] + hi[active]) // 2
+        value = values[mid if rows is None else rows[mid]]
+        target = targets[active]
+        after = value < target if side == 'left' else value <= target
+        lo[active] = np.where(after, mid + 1, lo[active])
+        hi[active] = np.where(after, hi[active], mid)
+        active = active[lo[active] < hi[active]]
+    return lo
+
+
+def postfix_starts(pdb: Pdb) -> ndarray:
+    """Return the first position of every postfix of a PDB."""
+    end = pdb.end
+    return np.flatnonzero(np.concatenate(([True], end[1:] != end[:-1]))) \
+        if len(end) else np.zeros(0, dtype=np.int64)
+
+
+# admissible items of pseudo-projected postfixes are expanded in batches of
+# at most this many rows when they are counted, unless a sequence has more
+BATCH_ROWS = 1 << 14
+
+
+def batches(seq: ndarray, lengths: ndarray, rows: int) -> List[int]:
+    """Split postfixes into batches of at most rows items between sequences.
+
+    Supports counted in batches add up, as every sequence is in a single
+    batch, which only takes more than rows items if the sequence does.
+
+    Args:
+        seq: Sequence of every postfix in non-decreasing order.
+        lengths: Number of items of every postfix.
+        rows: Number of items of a batch.
+
+    Returns:
+        Bounds of batches, where the k-th batch is postfixes from the k-th
+        bound up to the next one.
+    """
+    ends = np.cumsum(lengths)
+    bounds, done = [0], 0
+    if len(ends) and ends[-1] > rows:
+        starts = np.flatnonzero(np.concatenate(([True], seq[1:] != seq[:-1])))
+        while ends[-1] - done > rows:
+            # the first postfix beyond rows, moved back to the first postfix
+            # of its sequence, or the next sequence if it is the only one
+            cut = np.searchsorted(ends, done + rows, 'right')
+            cut = starts[np.searchsorted(starts, cut, 'right') - 1]
+            if cut == bounds[-1]:
+                at = np.searchsorted(starts, cut, 'right')
+                cut = starts[at] if at < len(starts) else len(ends)
+            bounds.append(int(cut))
+            done = ends[cut - 1]
+    if bounds[-1] < len(lengths):
+        bounds.append(len(lengths))
+    return bounds
+
+
+def recode(
+        extensions: ndarray, values: ndarray, batch_values: ndarray
+) -> ndarray:
+    """Encode extensions by codes of values instead of batch_values."""
+    item, code = np.divmod(extensions, len(batch_values))
+    return item * len(values) + np.searchsorted(values, batch_values)[code]
+
+
+def merge_batches(
+        extensions: ndarray, parts: List[Tuple[Any, ...]]
+) -> Tuple[ndarray, ndarray, ndarray, ndarray]:
+    """Merge supports of batches of occurrences counted on their own.
+
+    Args:
+        extensions: Extension of every occurrence, encoded by itemized
+            intervals of its batch, which are encoded by those of all
+            batches in place.
+        parts: (start, stop, values, keys, counts, results) of every batch,
+            where occurrences of the batch are extensions[start:stop].
+
+    Returns:
+        Itemized intervals of all batches, and keys, counts and results of
+        all of them as in `Node`.
+    """
+    values = np.unique(np.concatenate([part[2] for part in parts]))
+    keys = []
+    for start, stop, batch_values, batch_keys, _, _ in parts:
+        extensions[start:stop] = recode(
+            extensions[start:stop], values, batch_values)
+        keys.append(recode(batch_keys, values, batch_values))
+
+    # supports of an extension in every batch add up, as batches never
+    # share a sequence
+    keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+    counts, results = (
+        np.bincount(inverse, np.concatenate([
+            part[k] for part in parts]), len(keys)).astype(np.int64)
+        for k in (4, 5))
+    return values, keys, counts, results
+
+
+# a dense matrix of (key, group) marks is used for counting when it takes at
+# most this many bytes per row counted
+DENSE_BYTES_PER_ROW = 16
+
+
+def count_distinct(
+        groups: ndarray, keys: ndarray) -> Tuple[ndarray, ndarray]:
+    """Count distinct groups (e.g. sequences) of every key.
+
+    When groups are in non-decreasing order, as sequences of rows of a PDB
+    are, and there are few enough of keys and groups, duplicates are dropped
+    by marking (key, group) pairs in a temporary dense bool matrix, whose
+    rows are counted. Otherwise (group, key) pairs are sorted to drop
+    duplicates.
+
+    Returns:
+        Keys occurring at least once in ascending order, and their counts.
+    """
+    if not len(keys):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    # compact keys into 0, 1, ... in the same order, by a table over the
+    # range of keys only if it is not much larger than keys, since keys of
+    # items late in a large dictionary are large
+    if int(keys.max()) < DENSE_BYTES_PER_ROW * len(keys):
+        present = np.bincount(keys) > 0
+        distinct = np.flatnonzero(present)
+        index = (np.cumsum(present) - 1)[keys]
+    else:
+        order = np.argsort(keys, kind='stable')
+        first = np.concatenate(([True], np.diff(keys[order]) != 0))
+        distinct = keys[order][first]
+        index = np.empty(len(keys), dtype=np.int64)
+        index[order] = np.cumsum(first) - 1
+
+    if np.all(groups[1:] >= groups[:-1]):
+        groups = np.cumsum(np.concatenate(
+            ([False], groups[1:] != groups[:-1])))
+        n_groups = int(groups[-1]) + 1
+        if len(distinct) * n_groups <= DENSE_BYTES_PER_ROW * len(keys):
+            seen = np.zeros((len(distinct), n_groups), dtype=bool)
+            seen[index, groups] = True
+            return distinct, np.count_nonzero(seen, axis=1)
+
+    pairs = np.sort(groups.astype(np.int64) * len(distinct) + index)
+    pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+    return distinct, np.bincount(
+        pairs % len(distinct), minlength=len(distinct))
+
+
+def select_top(patterns: List[Pattern], top_k: int = None) -> List[Pattern]:
+    """Select top_k patterns of the highest supports if top_k is set, where
+    ties are broken by the order of patterns."""
+    if top_k is None:
+        return patterns
+    return sorted(patterns, key=lambda p: -p.support)[:top_k]
+
+
+class Engine:
+    # Array-based implementation of `Gisp.mine` on an encoded `Isdb`.
+    #
+    # It mines the same patterns as the DataFrame implementation, but every
+    # PDB is a set of pointer arrays (see `Pdb`), so projecting a postfix is
+    # slicing a range of rows instead of scanning the whole database, and
+    # support counting works on int codes, deduplicated through a dense
+    # matrix of marks when the PDB is dense (see `count_distinct`).
+    #
+    # With pseudo projection, a PDB is only a record per postfix (see
+    # `Postfixes`) and its rows are expanded in batches of sequences while
+    # the PDB is counted, so memory along the search path grows with the
+    # number of postfixes instead of the number of their items. Occurrences
+    # only keep their postfix, and records of child postfixes are built when
+    # a child is projected.
+    #
+    # With top_k, supports of the best patterns found so far are kept in a
+    # heap, and the effective minimal support rises above the k-th of them,
+    # since an extension never has a higher support than its prefix.
+    #
+    # With closed (or maximal), a pattern is yielded from the node of its own
+    # PDB, after checking that no forward extension counted there, and no
+    # backward extension (an element prepended before its head) has the same
+    # support (or is frequent at all). Whole subtrees are skipped when some
+    # element precedes every head of a PDB (BackScan of BIDE), since then
+    # every pattern in the subtree has a backward extension of the same
+    # support.
+    #
+    # Costs of projecting, itemizing and counting are recorded per level in
+    # a `Stats`, which only takes a few clock reads per PDB.
+    #
+    # With a `PdbCache`, every PDB is kept counted with supports of all of its
+    # extensions (see `Node`), and PDBs found in the cache are neither
+    # projected nor counted again. Rows of infrequent items are then kept in
+    # the ISDB, so that cached positions stay valid for any min_support.
+
+    def __init__(
+            self, gisp: Gisp, isdb: Isdb, pseudo_projection: bool = False,
+            stats: Stats = None
+    ) -> None:
+        self._gisp = gisp
+        self._isdb = isdb
+        self._pseudo_projection = pseudo_projection
+        self._item_order = None  # rows sorted by item, built on demand
+        self._item_bounds = None  # rows of the k-th item in the order
+        self._min_support = gisp._min_support  # raised by top_k
+        self._top_supports: List[int] = []  # min-heap of top_k supports
+        self._closing = gisp._closed or gisp._maximal
+        self._stats = Stats() if stats is None else stats
+        self._cache: PdbCache = gisp._cache
+
+    def found(self, pattern: Pattern) -> Pattern:
+        """Record a pattern to be yielded, raising the minimal support."""
+        top_k = self._gisp._top_k
+        if top_k is not None:
+            heapq.heappush(self._top_supports, pattern.support)
+            if len(self._top_supports) > top_k:
+                heapq.heappop(self._top_supports)
+            if len(self._top_supports) == top_k:
+                # ties with the k-th pattern found earlier never make it
+                self._min_support = max(
+                    self._min_support, self._top_supports[0] + 1)
+        return pattern
+
+    def iter_patterns(self) -> Iterator[Pattern]:
+        """Yield patterns in depth-first order."""
+        if self._cache is not None:
+            self._cache.bind(self._isdb)
+        codes, counts = self.frequent_items()
+        # rows of infrequent items can never be in a frequent pattern, but a
+        # memory-mapped database is mined in place rather than copied
+        if not self._isdb.mapped and self._cache is None:
+            self._isdb = self._isdb.keep_items(codes)
+            self._item_order = None
+        for code, count in zip(codes, counts):
+            if count >= self._min_support:
+                yield from self.iter_item_patterns(code, count)
+
+    def frequent_items(self) -> Tuple[ndarray, ndarray]:
+        """Return codes and supports of frequent items."""
+        start = perf_counter()
+        isdb = self._isdb
+        codes, counts = count_distinct(isdb.seq, isdb.item)
+        frequent = counts >= self._gisp._min_support
+        self._stats.add_time(0, 'count', perf_counter() - start)
+        return codes[frequent], counts[frequent]
+
+    def iter_item_patterns(
+            self, code: int, count: int, shard: Tuple[int, int] = None
+    ) -> Iterator[Pattern]:
+        """Yield patterns headed by the item of the code.
+
+        Args:
+            code: Code of a frequent item.
+            count: Support of the item.
+            shard: (k, n) to only yield the pattern of the item itself
+                if k is 0, and patterns extended by the k-th, (k + n)-th,
+                ... frequent extensions of the item, for splitting the
+                subtree into n independent tasks.
+        """
+        isdb = self._isdb
+        start = perf_counter()
+        rows = self.item_rows(code)
+        self._stats.add_time(1, 'project', perf_counter() - start)
+
+        prefix, pending = [(0, isdb.items[code])], None
+        if self._gisp._min_whole_interval == 0 and (
+                shard is None or shard[0] == 0):
+            pattern = Pattern(prefix, int(count))
+            if self._closing:
+                pending = (pattern, rows, rows)
+            else:
+                yield self.found(pattern)
+        if self._gisp._max_length is not None \
+                and self._gisp._max_length <= 1:
+            if pending is not None:
+                yield from self.close(pending, {})
+            return
+
+        node, pdb = self.cached(prefix), None
+        if node is None:
+            start = perf_counter()
+            pdb = self.project_item(rows)
+            self._stats.add_time(1, 'project', perf_counter() - start)
+        yield from self.iter_subpatterns(prefix, pdb, shard, pending, node)
+
+    def item_rows(self, code: int) -> ndarray:
+        """Return ISDB rows of the item of the code."""
+        isdb = self._isdb
+        if self._item_order is None:
+            self._item_order = np.argsort(isdb.item, kind='stable')
+            self._item_bounds = np.concatenate(([0], np.cumsum(np.bincount(
+                isdb.item, minlength=len(isdb.items)))))
+        return self._item_order[
+            self._item_bounds[code]:self._item_bounds[code + 1]]
+
+    def project_item(self, rows: ndarray) -> Union[Pdb, Postfixes]:
+        """Build the PDB of postfixes following rows of an item."""
+        isdb = self._isdb
+        interval = isdb.interval[rows]
+        if self._pseudo_projection:
+            return Postfixes(rows + 1, isdb.ends[rows], interval, rows)
+        return self.truncate(self.project(
+            rows + 1, isdb.ends[rows], interval, rows))
+
+    def iter_subpatterns(
+            self, prefix: List[Tuple[int, str]], pdb: Union[Pdb, Postfixes],
+            shard: Tuple[int, int] = None,
+            pending: Tuple[Pattern, ndarray, ndarray] = None,
+            node: Node = None
+    ) -> Iterator[Pattern]:
+        """Yield patterns extending prefix from its PDB recursively.
+
+        Args:
+            prefix: The pattern projecting the PDB.
+            pdb: The PDB of prefix, None if node is given.
+            shard: (k, n) to only extend prefix by the k-th, (k + n)-th, ...
+                frequent extensions.
+            pending: (pattern, heads, tails) of prefix to be yielded if it is
+                closed, where heads and tails are rows of its occurrences.
+            node: The PDB already counted, taken from the cache.
+        """
+        stats, level = self._stats, len(prefix)
+        cached = node is not None
+        if not cached:
+            node = self.count_node(prefix, pdb)
+            if self._cache is not None and node.rows:
+                self._cache.put(self.cache_key(prefix), *stored(node))
+        live = sum(array.nbytes for array in node.pdb)
+        for array in (node.owners, node.stops):
+            if array is not None:
+                live += array.nbytes
+        if cached:
+            # only memory along the search path is recorded, as the node was
+            # counted before
+            stats.enter(level, node.rows, live)
+        if not node.rows:
+            stats.release(live)
+            if pending is not None:
+                yield from self.close(pending, {})
+            return
+
+        start = perf_counter()
+        min_support = self._min_support
+        keys, counts, results = (
+            array.tolist() for array in (node.keys, node.counts, node.results))
+        # a maximal pattern has no extension frequent under the given
+        # min_support, whereas the one raised by top_k only prunes the search
+        limit = self._gisp._min_support if self._gisp._maximal else min_support
+        closed = [] if pending is None else list(self.close(pending, {
+            key: result for key, result in zip(keys, results)
+            if result >= limit}))
+        covered = self._closing and self.covered_backward(head_rows(node.pdb))
+        stats.add_time(level, 'count', perf_counter() - start)
+        yield from closed
+        if covered:
+            stats.release(live)
+            return
+
+        isdb, max_length = self._isdb, self._gisp._max_length
+        frequent = [index for index, count in enumerate(counts)
+                    if count >= min_support]
+        for index, at in enumerate(frequent):
+            if shard is not None and index % shard[1] != shard[0]:
+                continue
+            if counts[at] < self._min_support:
+                continue
+            extension = keys[at]
+            item, code = divmod(extension, len(node.values))
+            subprefix = prefix + [(node.values[code].item(), isdb.items[item])]
+
+            subpending = None
+            if results[at] >= self._min_support:
+                pattern = Pattern(subprefix, results[at])
+                if self._closing:
+                    lo, hi = np.searchsorted(
+                        node.extensions, [extension, extension + 1])
+                    subpending = (
+                        pattern, node.heads[lo:hi], node.tails[lo:hi])
+                else:
+                    yield self.found(pattern)
+            if max_length is not None and len(subprefix) >= max_length:
+                if subpending is not None:
+                    yield from self.close(subpending, {})
+                continue
+
+            child_node = self.cached(subprefix)
+            child_pdb = None
+            if child_node is None:
+                start = perf_counter()
+                child_pdb = self.project_child(node, extension)
+                stats.add_time(level + 1, 'project', perf_counter() - start)
+            yield from self.iter_subpatterns(
+                subprefix, child_pdb, pending=subpending, node=child_node)
+        stats.release(live)
+
+    def count_node(
+            self, prefix: List[Tuple[int, str]], pdb: Union[Pdb, Postfixes],
+            codes: ndarray = None
+    ) -> Node:
+        """Count every extension of prefix in its PDB.
+
+        Args:
+            prefix: The pattern projecting the PDB.
+            pdb: The PDB of prefix.
+            codes: Only count extensions by the items of these codes if given,
+                e.g. for counting supports of given patterns only, where the
+                node should not be cached.
+        """
+        if isinstance(pdb, Postfixes):
+            return self.count_postfixes(prefix, pdb, codes)
+        stats, level = self._stats, len(prefix)
+        start = perf_counter()
+        nbytes = sum(array.nbytes for array in pdb)
+        n_rows = len(pdb.row)
+        # only admissible items are counted, found by binary search
+        positions = self.admissible(pdb)
+        if positions is None:
+            row, base, head = pdb.row, pdb.base, pdb.head
+            expanded = 0
+        else:
+            row, base, head = (array[positions] for array in (
+                pdb.row, pdb.base, pdb.head))
+            expanded = positions.nbytes + row.nbytes + base.nbytes \
+                + head.nbytes
+        if codes is not None:
+            keep = np.flatnonzero(self.item_mask(codes)[self._isdb.item[row]])
+            row, base, head = row[keep], base[keep], head[keep]
+            positions = keep if positions is None else positions[keep]
+        itemizing = perf_counter()
+        stats.add_time(level, 'project', itemizing - start)
+        stats.enter(level, n_rows, nbytes + expanded)
+        if not n_rows:
+            stats.release(expanded)
+            return self.empty_node(pdb, 0)
+
+        gisp, isdb = self._gisp, self._isdb
+        values, codes = np.unique(
+            gisp._itemize(isdb.interval[row] - base), return_inverse=True)
+        counting = perf_counter()
+        stats.add_time(level, 'itemize', counting - itemizing)
+
+        # an extension is an (item, itemized_interval) pair encoded as int
+        extensions = isdb.item[row].astype(np.int64) * len(values) + codes
+        keys, counts, results = self.count_supports(row, head, extensions)
+        projecting = perf_counter()
+        stats.add_time(level, 'count', projecting - counting)
+        stats.node(prefix, n_rows, projecting - itemizing)
+
+        order = np.argsort(extensions, kind='stable')
+        positions = order if positions is None else positions[order]
+        # rows of occurrences, for checking closed patterns
+        tails, heads = row[order], head[order]
+        stats.release(expanded)
+        if (counts >= self._min_support).any():
+            stats.add_time(level + 1, 'project', perf_counter() - projecting)
+        return Node(
+            pdb, n_rows, values, keys, counts, results, extensions[order],
+            positions, None, None, heads, tails)
+
+    def count_postfixes(
+            self, prefix: List[Tuple[int, str]], pdb: Postfixes,
+            codes: ndarray = None
+    ) -> Node:
+        """Count every extension of prefix in its pseudo-projected PDB.
+
+        Admissible items of postfixes are expanded and counted in batches
+        (see `batches`), adding up their supports, so that expanded rows
+        never take more memory than a batch. Occurrences only keep their
+        postfix, from which postfixes of children are built when they are
+        projected (see `project_child`).
+
+        Args:
+            prefix: The pattern projecting the PDB.
+            pdb: The PDB of prefix.
+            codes: Only count extensions by the items of these codes if given.
+        """
+        stats, level = self._stats, len(prefix)
+        gisp, isdb = self._gisp, self._isdb
+        start = perf_counter()
+        nbytes = sum(array.nbytes for array in pdb)
+        n_rows = int((pdb.stop - pdb.start).sum())
+        lo, hi, stops = self.window(pdb.start, pdb.stop, pdb.base, pdb.head)
+        wanted = None if codes is None else self.item_mask(codes)
+        bounds = batches(isdb.seq[pdb.head], hi - lo, BATCH_ROWS)
+        stats.add_time(level, 'project', perf_counter() - start)
+
+        # occurrences of batches are written into these
+        n_admissible = int((hi - lo).sum())
+        extensions, tails, owners = (
+            np.empty(n_admissible, dtype=np.int64) for _ in range(3))
+        parts, at, expanded, seconds = [], 0, 0, 0.0
+        for first, last in zip(bounds[:-1], bounds[1:]):
+            projecting = perf_counter()
+            row, owner = ranges(lo[first:last], hi[first:last])
+            owner += first
+            if wanted is not None:
+                keep = np.flatnonzero(wanted[isdb.item[row]])
+                row, owner = row[keep], owner[keep]
+            expanded = max(expanded, row.nbytes + owner.nbytes)
+            stop = at + len(row)
+            tails[at:stop], owners[at:stop] = row, owner
+            itemizing = perf_counter()
+            stats.add_time(level, 'project', itemizing - projecting)
+            if not len(row):
+                continue
+            values, local = np.unique(
+                gisp._itemize(isdb.interval[row] - pdb.base[owner]),
+                return_inverse=True)
+            counting = perf_counter()
+            stats.add_time(level, 'itemize', counting - itemizing)
+            # an extension is an (item, itemized_interval) pair encoded as
+            # int, by itemized intervals of the batch until they are merged
+            extensions[at:stop] = \
+                isdb.item[row].astype(np.int64) * len(values) + local
+            parts.append((at, stop, values, *self.count_supports(
+                row, pdb.head[owner], extensions[at:stop])))
+            at = stop
+            stats.add_time(level, 'count', perf_counter() - counting)
+            seconds += perf_counter() - itemizing
+        stats.enter(level, n_rows, nbytes + expanded)
+        stats.release(expanded)
+        if not n_rows or not parts:
+            return self.empty_node(pdb, n_rows)
+
+        start = perf_counter()
+        extensions, tails, owners = (
+            array[:at] for array in (extensions, tails, owners))
+        if len(parts) == 1:
+            values, keys, counts, results = parts[0][2:]
+        else:
+            values, keys, counts, results = merge_batches(extensions, parts)
+        stats.add_time(level, 'count', perf_counter() - start)
+        stats.node(prefix, n_rows, seconds + perf_counter() - start)
+
+        projecting = perf_counter()
+        order = np.argsort(extensions, kind='stable')
+        extensions = extensions[order]
+        tails = tails[order]
+        owners = owners[order]
+        stops = None if stops is pdb.stop else stops
+        stats.allocate(owners.nbytes + (0 if stops is None else stops.nbytes))
+        if (counts >= self._min_support).any():
+            stats.add_time(level + 1, 'project', perf_counter() - projecting)
+        return Node(
+            pdb, n_rows, values, keys, counts, results, extensions, None,
+            owners, stops, pdb.head[owners], tails)
+
+    def count_supports(
+            self, row: ndarray, head: ndarray, extensions: ndarray
+    ) -> Tuple[ndarray, ndarray, ndarray]:
+        """Count supports of extensions of ISDB rows, whose heads are head.
+
+        Returns:
+            Extensions occurring at least once in ascending order, their
+            supports, and their supports within min_whole_interval.
+        """
+        gisp, isdb = self._gisp, self._isdb
+        seq = isdb.seq[row]
+        keys, counts = count_distinct(seq, extensions)
+        if gisp._min_whole_interval <= 0:
+            return keys, counts, counts
+        within = isdb.interval[row] - isdb.interval[head] \
+            >= gisp._min_whole_interval
+        result_keys, result_counts = count_distinct(
+            seq[within], extensions[within])
+        # every extension within min_whole_interval is counted in keys
+        results = np.zeros_like(counts)
+        results[np.searchsorted(keys, result_keys)] = result_counts
+        return keys, counts, results
+
+    def item_mask(self, codes: ndarray) -> ndarray:
+        """Return a mask over the item dictionary of the items of codes."""
+        wanted = np.zeros(len(self._isdb.items), dtype=bool)
+        wanted[codes] = True
+        return wanted
+
+    @staticmethod
+    def empty_node(pdb: Union[Pdb, Postfixes], n_rows: int) -> Node:
+        """Return the node of a PDB without any admissible item."""
+        empty = np.zeros(0, dtype=np.int64)
+        return Node(
+            pdb, n_rows, empty, empty, empty, empty, empty, None, None, None,
+            empty, empty)
+
+    def window(
+            self, starts: ndarray, stops: ndarray, base: ndarray,
+            head: ndarray, rows: ndarray = None
+    ) -> Tuple[ndarray, ndarray, ndarray]:
+        """Find admissible items of postfixes [start, stop) by binary search.
+
+        Items of a postfix are ordered by interval, so the items within
+        interval constraints of its last projected item are a range of it,
+        rather than a mask over all of its items.
+
+        Args:
+            starts: First position of each postfix.
+            stops: End position (exclusive) of each postfix.
+            base: Interval of the last projected item of each postfix.
+            head: ISDB row of the head item of each postfix.
+            rows: ISDB rows of positions, where positions are ISDB rows
+                themselves if not given.
+
+        Returns:
+            First and end positions of admissible items of every postfix, and
+            ends of postfixes before their items beyond max_whole_interval.
+        """
+        gisp, interval = self._gisp, self._isdb.interval
+        # every item of a postfix follows its last projected item, so bounds
+        # below are only searched when they may be above the start
+        if gisp._max_whole_interval != inf:
+            stops = search(
+                interval, starts, stops,
+                interval[head] + gisp._max_whole_interval, 'right', rows)
+        lo = starts
+        if gisp._min_interval > 0:
+            lo = search(
+                interval, starts, stops, base + gisp._min_interval, 'left',
+                rows)
+        hi = stops
+        if gisp._max_interval != inf:
+            hi = search(
+                interval, lo, stops, base + gisp._max_interval, 'right', rows)
+        return lo, hi, stops
+
+    def admissible(self, pdb: Pdb) -> Union[ndarray, None]:
+        """Return positions of admissible items of a PDB in order, None if
+        every item is admissible."""
+        gisp = self._gisp
+        # PDBs are truncated by max_whole_interval when projected
+        if gisp._min_interval <= 0 and gisp._max_interval == inf:
+            return None
+        starts = postfix_starts(pdb)
+        lo, hi, _ = self.window(
+            starts, pdb.end[starts], pdb.base[starts], pdb.head[starts],
+            pdb.row)
+        return ranges(lo, hi)[0]
+
+    def project_child(
+            self, node: Node, extension: int) -> Union[Pdb, Postfixes]:
+        """Project the PDB of a node by occurrences of an extension."""
+        if not node.rows:
+            return node.pdb
+        lo, hi = np.searchsorted(node.extensions, [extension, extension + 1])
+        if node.owners is not None:
+            # each postfix stops before its items beyond max_whole_interval,
+            # and empty ones are dropped
+            tails, owners = node.tails[lo:hi], node.owners[lo:hi]
+            stops = node.pdb.stop if node.stops is None else node.stops
+            children = Postfixes(
+                tails + 1, stops[owners], self._isdb.interval[tails],
+                node.heads[lo:hi])
+            nonempty = children.start < children.stop
+            return Postfixes(*(array[nonempty] for array in children))
+        matches = node.positions[lo:hi]
+        return self.project(
+            matches + 1, node.pdb.end[matches],
+            self._isdb.interval[node.pdb.row[matches]],
+            node.pdb.head[matches], node.pdb.row)
+
+    def cache_key(self, prefix: List[Tuple[int, str]]) -> Hashable:
+        """Return the key of the PDB of prefix under these constraints."""
+        gisp = self._gisp
+        return (tuple(prefix), gisp._itemize_key, gisp._min_interval,
+                gisp._max_interval, gisp._min_whole_interval,
+                gisp._max_whole_interval, self._pseudo_projection)
+
+    def cached(self, prefix: List[Tuple[int, str]]) -> Union[Node, None]:
+        """Return the counted PDB of prefix if it is cached."""
+        if self._cache is None:
+            return None
+        return self._cache.get(self.cache_key(prefix))
+
+    def close(
+            self, pending: Tuple[Pattern, ndarray, ndarray],
+            results: Dict[int, int]
+    ) -> Iterator[Pattern]:
+        """Yield the pending pattern if it is closed (or maximal).
+
+        Args:
+            pending: (pattern, heads, tails) of the pattern.
+            results: Supports of forward extensions of the pattern.
+        """
+        pattern, heads, tails = pending
+        if self._gisp._maximal:
+            if results:
+                return
+            limit = self._gisp._min_support
+        else:
+            if pattern.support in results.values():
+                return
+            limit = pattern.support
+        max_length = self._gisp._max_length
+        if max_length is None or len(pattern.sequence) < max_length:
+            counts = self.count_backward(
+                heads, tails, self._isdb.seq[heads])
+            if (counts >= limit).any():
+                return
+        yield self.found(pattern)
+
+    def covered_backward(self, heads: ndarray) -> bool:
+        """Check whether some element precedes every head (BackScan).
+
+        This only holds for open whole interval constraints and length,
+        where prepending an element to any pattern keeps its occurrences.
+        """
+        gisp = self._gisp
+        if gisp._min_whole_interval > 0 or gisp._max_whole_interval != inf \
+                or gisp._max_length is not None:
+            return False
+        heads = np.unique(heads)
+        counts = self.count_backward(heads, heads, heads)
+        return bool((counts == len(heads)).any())
+
+    def count_backward(
+            self, heads: ndarray, tails: ndarray, groups: ndarray
+    ) -> ndarray:
+        """Count backward extensions by the number of distinct groups.
+
+        A backward extension is an element before the head of occurrences,
+        which are given by rows of their heads and tails.
+        """
+        gisp, isdb = self._gisp, self._isdb
+        # items before a head are ordered by interval too, so the admissible
+        # ones are a range found by binary search
+        starts, intervals = isdb.offsets[isdb.seq[heads]], isdb.interval
+        lo = search(intervals, starts, heads, np.maximum(
+            intervals[heads] - gisp._max_interval,
+            intervals[tails] - gisp._max_whole_interval))
+        hi = search(intervals, lo, heads, np.minimum(
+            intervals[heads] - gisp._min_interval,
+            intervals[tails] - gisp._min_whole_interval), 'right')
+        rows, owner = ranges(lo, hi)
+        if not len(rows):
+            return np.zeros(0, dtype=np.int64)
+
+        values, codes = np.unique(
+            gisp._itemize(intervals[heads[owner]] - intervals[rows]),
+            return_inverse=True)
+        extensions = isdb.item[rows].astype(np.int64) * len(values) + codes
+        _, counts = count_distinct(groups[owner], extensions)
+        return counts
+
+    def project(
+            self, starts: ndarray, stops: ndarray, base: ndarray,
+            head: ndarray, row: ndarray = None
+    ) -> Pdb:
+        """Build the PDB of postfixes [start, stop).
+
+        Args:
+            starts: First position of each postfix.
+            stops: End position (exclusive) of each postfix.
+            base: Interval of the last projected item of each postfix.
+            head: ISDB row of the head item of each postfix.
+            row: ISDB rows of positions, where positions are ISDB rows
+                themselves if not given.
+        """
+        positions, owner = ranges(starts, stops)
+        lengths = stops - starts
+        end = np.repeat(np.cumsum(lengths), lengths)
+        return Pdb(
+            positions if row is None else row[positions],
+            base[owner], head[owner], end)
+
+    def truncate(self, pdb: Pdb) -> Pdb:
+        """Drop items beyond max_whole_interval from the head.
+
+        Whole intervals only grow in deeper levels, so these items can never
+        be extensions.
+        """
+        interval = self._isdb.interval
+        keep = interval[pdb.row] - interval[pdb.head] \
+            <= self._gisp._max_whole_interval
+        if keep.all():
+            return pdb
+        # ends shift back by the number of items dropped before them
+        dropped = np.concatenate(([0], np.cumsum(~keep)))
+        end = pdb.end - dropped[pdb.end]
+        return Pdb(*(array[keep] for array in (
+            pdb.row, pdb.base, pdb.head, end)))
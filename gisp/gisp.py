@@ -1,6 +1,20 @@
-from typing import Callable, List, NamedTuple, Tuple
+from math import inf
+from time import perf_counter
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, NamedTuple,
+    Tuple, Union)
 
-from pandas import DataFrame, concat
+from .cache import PdbCache
+from .isdb import Isdb
+from .itemize import vectorize
+from .stats import Stats
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    from pandas import DataFrame
+
+    from .distributed import Transport
 
 
 class Pattern(NamedTuple):
@@ -38,38 +52,150 @@ class Gisp:
     # projected interval-extended sequence database represented in PDB is a the
     # collection of postfixes regard to a, where a is an interval-extended
     # sequence.
+    #
+    # With pseudo_projection, the database is mined by the array-based engine
+    # where a PDB is only a list of (start, stop, anchor interval, whole
+    # interval offset) records pointing into the single original ISDB, so no
+    # postfix is ever copied.
+    #
+    # With n_jobs other than 1 or an executor, subtrees of frequent items (or
+    # of their extensions with split_level 2) are mined in worker processes,
+    # see `gisp.parallel.mine`.
+    #
+    # Intervals are itemized a whole array at a time, either by a built-in
+    # `gisp.itemize.Itemizer` such as FixedWidth, Log2 and Breakpoints, or by
+    # a function which is called on arrays if it accepts them, and once per
+    # distinct interval otherwise.
+    #
+    # max_length bounds the number of elements of patterns. With top_k, only
+    # the top_k patterns of the highest supports (ties broken by order of
+    # discovery) are mined, and the effective minimal support rises as they
+    # are found to cut search branches early.
+    #
+    # With closed, only patterns without a one-element extension (forward or
+    # prepended before the head) of the same support are mined, and with
+    # maximal, only patterns without any frequent one-element extension.
+    # Both prune the search instead of filtering mined patterns.
+    #
+    # Costs of every recursion level, such as the number and size of PDBs and
+    # time of projecting, itemizing and counting, are recorded when a
+    # `gisp.stats.Stats` is passed to `mine`.
+    #
+    # With a `gisp.cache.PdbCache`, counted PDBs are kept across runs on the
+    # same encoded `Isdb` and reused by runs of the same itemize and interval
+    # constraints, e.g. sweeping min_support.
+    #
+    # With a transport, the ISDB is partitioned by sid and mined by workers
+    # of partitions which may run on other nodes, see
+    # `gisp.distributed.iter_patterns`.
 
     def __init__(
             self, itemize: Callable[[int], int], min_support: int,
             min_interval: int, max_interval: int,
-            min_whole_interval: int, max_whole_interval: int
+            min_whole_interval: int, max_whole_interval: int,
+            pseudo_projection: bool = False, n_jobs: int = 1,
+            split_level: int = 1, executor: 'Executor' = None,
+            max_length: int = None, top_k: int = None,
+            closed: bool = False, maximal: bool = False,
+            cache: PdbCache = None, transport: 'Transport' = None
     ) -> None:
-        self._itemize = itemize
+        if (cache is not None or transport is not None) \
+                and (n_jobs != 1 or executor is not None):
+            raise ValueError(
+                'cache and transport are not supported with worker processes')
+        if max_length is not None and max_length < 1:
+            raise ValueError(f'max_length {max_length} is not positive')
+        if top_k is not None and top_k < 1:
+            raise ValueError(f'top_k {top_k} is not positive')
+        self._itemize = vectorize(itemize)
+        self._itemize_key = itemize  # identity of itemize for the cache
         self._min_support = min_support
         self._min_interval = min_interval
         self._max_interval = max_interval
         self._min_whole_interval = min_whole_interval
         self._max_whole_interval = max_whole_interval
+        self._pseudo_projection = pseudo_projection
+        self._n_jobs = n_jobs
+        self._split_level = split_level
+        self._executor = executor
+        self._max_length = max_length
+        self._top_k = top_k
+        self._closed = closed
+        self._maximal = maximal
+        self._cache = cache
+        self._transport = transport
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # settings shipped to worker processes, without the executor
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        state['_cache'] = None
+        state['_transport'] = None
+        return state
+
+    def replace(self, **settings: Any) -> 'Gisp':
+        """Return a copy with some settings replaced, e.g.
+        gisp.replace(min_support=10), keeping the executor, the cache and
+        the transport unless they are replaced."""
+        arguments = dict(
+            itemize=self._itemize_key, min_support=self._min_support,
+            min_interval=self._min_interval, max_interval=self._max_interval,
+            min_whole_interval=self._min_whole_interval,
+            max_whole_interval=self._max_whole_interval,
+            pseudo_projection=self._pseudo_projection, n_jobs=self._n_jobs,
+            split_level=self._split_level, executor=self._executor,
+            max_length=self._max_length, top_k=self._top_k,
+            closed=self._closed, maximal=self._maximal, cache=self._cache,
+            transport=self._transport)
+        arguments.update(settings)
+        return Gisp(**arguments)
 
     @staticmethod
-    def transform(sequences: List[Tuple[int, List[str]]]) -> DataFrame:
-        """Transform sequences into DataFrame (ISDB) for mining."""
+    def transform(
+            sequences: Iterable[List[Tuple[int, List[str]]]],
+            encode: bool = False
+    ) -> Union['DataFrame', Isdb]:
+        """Transform sequences into DataFrame (ISDB) for mining.
 
-        def yield_item_rows() -> Tuple[int, str, int]:
-            for sid, sequence in enumerate(sequences):
-                for interval, items in sequence:
-                    for item in items:
-                        yield sid, item, interval
+        Args:
+            sequences: Interval-extended sequences,
+                where each sequence is a list of (interval, items). It may be
+                any iterator, which is consumed one sequence at a time.
+            encode: Return a dictionary-encoded `Isdb` instead,
+                which is mined by the array-based engine.
+        """
+        isdb = Isdb.from_sequences(sequences)
+        return isdb if encode else isdb.to_frame()
 
-        isdb = DataFrame(yield_item_rows(), columns=[
-                         'sid', 'item', 'interval'])
-        isdb.sort_values(by=['sid', 'interval', 'item'], inplace=True)
-        return isdb
+    def mine(
+            self, isdb: Union['DataFrame', Isdb], stats: Stats = None
+    ) -> List[Pattern]:
+        """Driver function to run the algorithm on the given database.
 
-    def mine(self, isdb: DataFrame) -> List[Pattern]:
-        """Driver function to run the algorithm on the given database."""
+        An encoded `Isdb` is mined by the array-based engine, which gives the
+        same patterns without copying any postfix. So is a DataFrame with
+        options only supported by the engine, after being encoded.
 
-        def yield_sub_pdbs(item: str) -> DataFrame:
+        Args:
+            isdb: The database returned by `Gisp.transform`.
+            stats: A `gisp.stats.Stats` to record costs of mining per level.
+        """
+        if stats is None:
+            stats = Stats()
+        parallel = self._n_jobs != 1 or self._executor is not None
+        engine_only = (
+            self._pseudo_projection or parallel
+            or self._max_length is not None or self._top_k is not None
+            or self._closed or self._maximal or self._cache is not None
+            or self._transport is not None)
+        if engine_only and not isinstance(isdb, Isdb):
+            isdb = Isdb.from_frame(isdb)
+        if isinstance(isdb, Isdb):
+            return list(self.iter_patterns(isdb, stats))
+        # the DataFrame implementation is the only one loading pandas
+        from pandas import concat
+
+        def yield_sub_pdbs(item: str) -> 'DataFrame':
             """Yield sub-PDBs of postfix projected by item."""
             matches = isdb[isdb['item'] == item]
             for pid, (i, (sid, _, interval)) in enumerate(matches.iterrows()):
@@ -77,11 +203,18 @@ class Gisp:
                 sub_pdb['interval'] -= interval
                 sub_pdb['whole_interval'] = sub_pdb['interval']
                 sub_pdb['pid'] = pid
-                yield sub_pdb
+                # whole intervals only grow in deeper levels, so these rows
+                # can never be extensions
+                yield sub_pdb[
+                    sub_pdb['whole_interval'] <= self._max_whole_interval]
 
+        start = perf_counter()
         counts = isdb.drop_duplicates(
             subset=['sid', 'item']).value_counts(subset='item')
         counts = counts[counts >= self._min_support]
+        # rows of infrequent items can never be in a frequent pattern
+        isdb = isdb[isdb['item'].isin(counts.index)]
+        stats.add_time(0, 'count', perf_counter() - start)
 
         patterns = []
         if self._min_whole_interval == 0:
@@ -89,18 +222,20 @@ class Gisp:
                 patterns.append(Pattern([(0, item)], count))
 
         for item, count in counts.items():
+            start = perf_counter()
             child_pdb = concat(yield_sub_pdbs(item), ignore_index=True)
             # need to ensure columns order when unpacking in interrows()
             child_pdb = child_pdb[
                 ['sid', 'pid', 'item', 'interval', 'whole_interval']]
-            subpatterns = self.mine_subpatterns(child_pdb)
-
-            for pattern in subpatterns:
-                pattern.sequence.insert(0, (0, item))
-            patterns.extend(subpatterns)
+            stats.add_time(1, 'project', perf_counter() - start)
+            patterns.extend(self.mine_subpatterns(
+                child_pdb, stats, [(0, item)]))
         return patterns
 
-    def mine_subpatterns(self, pdb: DataFrame) -> List[Pattern]:
+    def mine_subpatterns(
+            self, pdb: 'DataFrame', stats: Stats = None,
+            prefix: List[Tuple[int, str]] = None
+    ) -> List[Pattern]:
         """Perform level 2 or later projection to mine subpatterns recursively.
 
         Args:
@@ -108,20 +243,38 @@ class Gisp:
                 is a the collection of postfixes regard to a, where a be an 
                 interval-extended sequence. Each item in the database is a list
                 of postfixes for the original sequence.
+            stats: Costs are recorded into if given.
+            prefix: The pattern a, which prefixes sequences of subpatterns
+                if given.
         """
+        from pandas import concat
+        if stats is None:
+            stats = Stats()
+        prefix = prefix or []
+        level = len(prefix) or 1
+        nbytes = int(pdb.memory_usage().sum())
+        stats.enter(level, len(pdb), nbytes)
 
-        def yield_sub_pdbs(itemized_interval: int, item: str) -> DataFrame:
+        def yield_sub_pdbs(
+                itemized_interval: int, item: str) -> 'DataFrame':
             """Yield sub-PDBs of postfix projected by (itemized_interval, item).
             """
             matches = pdb[
-                (pdb['item'] == item)
+                constraints
+                & (pdb['item'] == item)
                 & (pdb['itemized_interval'] == itemized_interval)]
-            for i, (_, pid, _, interval, _, _) in matches.iterrows():
+            for sub_pid, (i, (_, pid, _, interval, _, _)) in enumerate(
+                    matches.iterrows()):
                 sub_pdb = pdb[pdb['pid'] == pid].loc[i + 1:]
                 sub_pdb['interval'] -= interval
+                # postfixes of the same parent postfix must not share pid
+                sub_pdb['pid'] = sub_pid
                 yield sub_pdb.drop(columns=['itemized_interval'])
 
-        pdb['itemized_interval'] = pdb['interval'].apply(self._itemize)
+        itemizing = perf_counter()
+        pdb['itemized_interval'] = self._itemize(pdb['interval'].to_numpy())
+        counting = perf_counter()
+        stats.add_time(level, 'itemize', counting - itemizing)
 
         # constraints = (
         #     (pdb['interval'] >= self._min_interval)
@@ -136,33 +289,73 @@ class Gisp:
             subset=['sid', 'item', 'itemized_interval']).value_counts(
                 subset=['item', 'itemized_interval'])
         counts = counts[counts >= self._min_support]
+        stats.add_time(level, 'count', perf_counter() - counting)
+        stats.node(prefix, len(pdb), perf_counter() - itemizing)
 
         patterns = []
         for (item, itemized_interval), count in counts.items():
+            start = perf_counter()
             child_pdb = concat(
                 yield_sub_pdbs(itemized_interval, item), ignore_index=True)
-            subpatterns = self.mine_subpatterns(child_pdb)
-
-            for pattern in subpatterns:
-                pattern.sequence.insert(0, (itemized_interval, item))
-            patterns.extend(subpatterns)
+            stats.add_time(level + 1, 'project', perf_counter() - start)
+            # sequences are built whole from the prefix instead of inserting
+            # every element at the front
+            patterns.extend(self.mine_subpatterns(
+                child_pdb, stats, prefix + [(itemized_interval, item)]))
 
+        start = perf_counter()
         constraints &= pdb['whole_interval'] >= self._min_whole_interval
         counts = pdb[constraints].drop_duplicates(
             subset=['sid', 'item', 'itemized_interval']).value_counts(
                 subset=['item', 'itemized_interval'])
         counts = counts[counts >= self._min_support]
+        stats.add_time(level, 'count', perf_counter() - start)
         for (item, itemized_interval), count in counts.items():
             patterns.append(Pattern(
-                sequence=[(itemized_interval, item)],
+                sequence=prefix + [(itemized_interval, item)],
                 support=count))
+        stats.release(nbytes)
         return patterns
 
+    def iter_patterns(
+            self, isdb: Union['DataFrame', Isdb], stats: Stats = None
+    ) -> Iterator[Pattern]:
+        """Yield patterns lazily as the depth-first search finds them.
+
+        Patterns are the same as `mine` in the same order, and the database
+        is always mined by the array-based engine. With top_k, patterns are
+        only yielded once the search is complete.
+
+        Args:
+            isdb: The database returned by `Gisp.transform`.
+            stats: A `gisp.stats.Stats` to record costs of mining per level.
+        """
+        if not isinstance(isdb, Isdb):
+            isdb = Isdb.from_frame(isdb)
+        if self._transport is not None:
+            from .distributed import iter_patterns
+            yield from iter_patterns(self, isdb, self._transport)
+            return
+        if self._n_jobs != 1 or self._executor is not None:
+            from .parallel import iter_patterns
+            yield from iter_patterns(
+                self, isdb, self._n_jobs, self._split_level, self._executor,
+                stats)
+            return
+
+        from .engine import Engine, select_top
+        patterns = Engine(
+            self, isdb, self._pseudo_projection, stats).iter_patterns()
+        if self._top_k is not None:
+            patterns = select_top(list(patterns), self._top_k)
+        yield from patterns
+
 
 def mine(
     sequences: List[Tuple[int, List[str]]], itemize: Callable[[int], int],
     min_support: int, min_interval: int = None, max_interval: int = None,
     min_whole_interval: int = None, max_whole_interval: int = None,
+    n_jobs: int = 1, executor: 'Executor' = None, **options: Any
 ) -> List[Pattern]:
     """Mine frequent interval-extended sequences.
 
@@ -177,10 +370,41 @@ def mine(
             the head and the tail of the sequence.
         max_whole_interval: Maximum interval between
             the head and the tail of the sequence.
+        n_jobs: Number of worker processes, None for the number of CPUs.
+        executor: An executor of processes to mine in instead of a new pool.
+        options: Other settings of `Gisp`, such as max_length, top_k,
+            closed, maximal, cache and transport.
 
     Returns:
         List of Pattern(sequence, support), 
         where sequence is a list of (itemized_interval, item),
         and support is the number of the pattern occurrence.
     """
-    pass
+    return list(iter_patterns(
+        sequences, itemize, min_support, min_interval, max_interval,
+        min_whole_interval, max_whole_interval, n_jobs, executor, **options))
+
+
+def iter_patterns(
+    sequences: Iterable[List[Tuple[int, List[str]]]],
+    itemize: Callable[[int], int], min_support: int,
+    min_interval: int = None, max_interval: int = None,
+    min_whole_interval: int = None, max_whole_interval: int = None,
+    n_jobs: int = 1, executor: 'Executor' = None, **options: Any
+) -> Iterator[Pattern]:
+    """Mine frequent interval-extended sequences lazily.
+
+    Takes the same arguments as `mine`, but yields patterns in the same
+    order as the depth-first search finds them, so that they can be written
+    out while mining without holding all of them.
+    """
+    gisp = Gisp(
+        itemize, min_support,
+        min_interval=0 if min_interval is None else min_interval,
+        max_interval=inf if max_interval is None else max_interval,
+        min_whole_interval=(
+            0 if min_whole_interval is None else min_whole_interval),
+        max_whole_interval=(
+            inf if max_whole_interval is None else max_whole_interval),
+        n_jobs=n_jobs, executor=executor, **options)
+    yield from gisp.iter_patterns(Gisp.transform(sequences, encode=True))
@@ -0,0 +1,474 @@
+from typing import (
+    Any, Dict, Iterable, Iterator, List, NamedTuple, Tuple, Union)
+
+import numpy as np
+from numpy import ndarray
+
+from .engine import Engine, Pdb, ranges
+from .gisp import Gisp, Pattern
+from .isdb import Isdb, IsdbBuilder
+
+
+class Extension(NamedTuple):
+
+    # Occurrences of a one-element extension in a PDB
+    count: int  # number of sequences, as counted for extending
+    result: int  # number of sequences within min_whole_interval
+    sids: ndarray  # sorted sids of the sequences counted in count
+    positions: ndarray  # positions of occurrences in the PDB
+
+
+# (engine, PDB) of a pattern in added or removed sequences, see
+# `IncrementalMiner.update`
+Delta = Tuple[Engine, Union[Pdb, None]]
+
+
+class Extensions:
+    # Occurrences of every extension in a PDB, grouped into slices of arrays
+    # by extension, where an `Extension` is only built for keys looked up.
+
+    def __init__(
+            self, keys: List[Tuple[int, str]], counts: List[int],
+            results: List[int], sids: ndarray, positions: ndarray,
+            sid_bounds: List[int], bounds: List[int]
+    ) -> None:
+        self._index = dict(zip(keys, range(len(keys))))
+        self._keys = keys
+        self._counts = counts
+        self._results = results
+        self._sids = sids
+        self._positions = positions
+        self._sid_bounds = sid_bounds  # sids of the k-th in [k, k + 1)
+        self._bounds = bounds  # positions of the k-th in [k, k + 1)
+
+    def __contains__(self, key: Tuple[int, str]) -> bool:
+        return key in self._index
+
+    def keys(self) -> Iterable[Tuple[int, str]]:
+        return self._index.keys()
+
+    def get(
+            self, key: Tuple[int, str], default: Extension = None
+    ) -> Extension:
+        index = self._index.get(key)
+        return default if index is None else self.extension(index)
+
+    def extension(self, index: int) -> Extension:
+        return Extension(
+            self._counts[index], self._results[index],
+            self._sids[self._sid_bounds[index]:self._sid_bounds[index + 1]],
+            self._positions[self._bounds[index]:self._bounds[index + 1]])
+
+    def items(
+            self, min_count: int = 0
+    ) -> Iterator[Tuple[Tuple[int, str], Extension]]:
+        """Yield extensions of counts at least min_count."""
+        for index, count in enumerate(self._counts):
+            if count >= min_count:
+                yield self._keys[index], self.extension(index)
+
+    def growth(self, *kept: Dict[Tuple[int, str], Any]) -> int:
+        """Return the highest count of extensions in none of kept."""
+        for index in np.argsort(self._counts)[::-1].tolist():
+            if not any(self._keys[index] in keys for keys in kept):
+                return self._counts[index]
+        return 0
+
+
+NO_EXTENSIONS = Extensions([], [], [], None, None, [0], [0])
+
+
+class Node:
+    # A pattern in the tree of frequent patterns kept by `IncrementalMiner`,
+    # or the root of the tree with no pattern.
+    #
+    # Besides its frequent extensions (children), a node keeps supports of
+    # its near-frequent extensions (border), that is extensions of supports
+    # at least buffer_support, and a floor, which is a bound of supports of
+    # every other extension. The floor starts at buffer_support and rises as
+    # sequences are added, until the node is counted again.
+
+    def __init__(
+            self, support: int, result: int, sids: Union[ndarray, None],
+            floor: int
+    ) -> None:
+        self.support = support  # number of sequences, as counted for extending
+        self.result = result  # support of the pattern itself
+        self.sids = sids  # sorted sids of the sequences, None for all
+        self.children: Dict[Tuple[int, str], Node] = {}
+        self.border: Dict[Tuple[int, str], int] = {}
+        self.floor = floor  # other extensions have lower supports
+
+
+def distinct(values: ndarray) -> ndarray:
+    """Return sorted distinct values, which sorting finds faster than
+    `numpy.unique` does for int keys."""
+    values = np.sort(values)
+    return values[np.concatenate(([True], values[1:] != values[:-1]))] \
+        if len(values) else values
+
+
+def contains(sorted_values: ndarray, values: ndarray) -> ndarray:
+    """Return whether each of values is in sorted_values, by binary search
+    instead of the hashing of `numpy.isin`."""
+    index = np.searchsorted(sorted_values, values)
+    return sorted_values[np.minimum(index, max(len(sorted_values) - 1, 0))] \
+        == values if len(sorted_values) else np.zeros(len(values), dtype=bool)
+
+
+class IncrementalMiner:
+    # Keeps the patterns of a growing ISDB up to date as sequences are
+    # appended, instead of mining the whole database again.
+    #
+    # Sequences are only ever appended, so the support of a pattern is its
+    # support in the database before plus its support in the new sequences.
+    # The miner keeps the tree of frequent patterns (see `Node`), and an
+    # update projects only the new sequences along branches of the tree
+    # they occur in. A node is counted again on the whole database, restricted
+    # to the sequences of its pattern, only when one of its border extensions
+    # becomes frequent, or when an extension not kept may have, that is its
+    # support in the new sequences reaches min_support - floor + 1. Then the
+    # subtrees of new frequent extensions are mined.
+    #
+    # A lower buffer_support keeps more extensions in borders, and recounts
+    # fewer nodes. The miner can be pickled to be kept across runs, as long
+    # as itemize is picklable.
+
+    def __init__(self, gisp: Gisp, buffer_support: int = None) -> None:
+        """
+        Args:
+            gisp: Settings of mining, where top_k, closed and maximal are not
+                supported.
+            buffer_support: Minimal support of near-frequent extensions kept
+                in the tree, defaults to half of min_support.
+        """
+        if gisp._top_k is not None or gisp._closed or gisp._maximal:
+            raise ValueError(
+                'top_k, closed and maximal are not supported incrementally')
+        if buffer_support is None:
+            buffer_support = max(1, gisp._min_support // 2)
+        if not 1 <= buffer_support <= gisp._min_support:
+            raise ValueError(
+                f'buffer_support should be in [1, min_support], '
+                f'got {buffer_support}')
+        self._gisp = gisp
+        self._buffer_support = buffer_support
+        self._isdb = Isdb.from_sequences([])
+        self._n_sequences = 0  # sid of the next sequence added
+        self._root = Node(0, 0, None, buffer_support)
+
+    @property
+    def isdb(self) -> Isdb:
+        """The database of all sequences added so far."""
+        return self._isdb
+
+    def add(self, sequences: Iterable[List[Tuple[int, List[str]]]]) -> None:
+        """Append sequences of (interval, items) and update patterns.
+
+        Sequences are numbered as sids following those added before.
+        """
+        builder = IsdbBuilder()
+        for sequence in sequences:
+            builder.add_sequence(sequence, self._n_sequences)
+            self._n_sequences += 1
+        delta = builder.build()
+        if not len(delta):
+            return
+        self._isdb = self._isdb.append(delta)
+        self.update(self._root, [], (Engine(self._gisp, delta), None))
+
+    def patterns(self) -> List[Pattern]:
+        """Return patterns in the same order as `Gisp.mine`."""
+        return list(self.iter_patterns(self._root, []))
+
+    def iter_patterns(
+            self, node: Node, prefix: List[Tuple[int, str]]
+    ) -> Iterator[Pattern]:
+        """Yield patterns in the subtree of node in depth-first order."""
+        # extensions are ordered by (item, itemized_interval)
+        for key in sorted(node.children, key=lambda key: (key[1], key[0])):
+            child, sequence = node.children[key], prefix + [key]
+            if child.result >= self._gisp._min_support:
+                yield Pattern(sequence, child.result)
+            yield from self.iter_patterns(child, sequence)
+
+    def update(
+            self, node: Node, path: List[Tuple[int, str]],
+            added: Union[Delta, None], removed: Union[Delta, None] = None,
+            changed: ndarray = None
+    ) -> None:
+        """Add supports of extensions in added sequences to the subtree, and
+        subtract those in removed sequences.
+
+        Args:
+            node: Node of the pattern path.
+            path: The pattern of node.
+            added: (engine, pdb) of path in sequences added, where the engine
+                is on those sequences only and pdb is None for the root, or
+                None if path occurs in none of them.
+            removed: The same of sequences removed.
+            changed: Sorted sids of removed sequences, some of which may be
+                added again as new versions.
+        """
+        min_support = self._gisp._min_support
+        plus = NO_EXTENSIONS if added is None else self.extensions(*added)
+        minus = NO_EXTENSIONS if removed is None \
+            else self.extensions(*removed)
+        empty = Extension(0, 0, np.zeros(0, dtype=np.int64), None)
+        growth = plus.growth(node.children, node.border)
+
+        promoted = False
+        for key in node.border:
+            if key in plus or key in minus:
+                node.border[key] += plus.get(key, empty).count \
+                    - minus.get(key, empty).count
+                promoted |= node.border[key] >= min_support
+
+        for key in list(node.children):
+            if key not in plus and key not in minus:
+                # no changed sequence has the pattern
+                continue
+            more, less = plus.get(key, empty), minus.get(key, empty)
+            child = node.children[key]
+            child.support += more.count - less.count
+            child.result += more.result - less.result
+            if changed is None:
+                # new sids always follow the existing ones
+                child.sids = np.concatenate((child.sids, more.sids))
+            else:
+                # sids of more are changed ones, so both parts are disjoint
+                child.sids = np.sort(np.concatenate((
+                    child.sids[~contains(changed, child.sids)], more.sids)))
+            if child.support < min_support:
+                # extensions of an infrequent pattern are never frequent
+                del node.children[key]
+                node.border[key] = child.support
+            elif self.extensible(len(path) + 1):
+                self.update(
+                    child, path + [key],
+                    self.descend(added, more), self.descend(removed, less),
+                    changed)
+        # border supports below buffer_support are bounded by the floor
+        node.border = {key: support for key, support in node.border.items()
+                       if support >= self._buffer_support}
+        if promoted or node.floor - 1 + growth >= min_support:
+            self.recount(node, path)
+        else:
+            node.floor += growth
+
+    def descend(
+            self, delta: Union[Delta, None], extension: Extension
+    ) -> Union[Delta, None]:
+        """Project a delta by occurrences of an extension, None if there are
+        none."""
+        if delta is None or extension.positions is None:
+            return None
+        engine, pdb = delta
+        return engine, self.project(engine, pdb, extension.positions)
+
+    def recount(self, node: Node, path: List[Tuple[int, str]]) -> None:
+        """Count extensions of node on the sequences of its pattern."""
+        isdb = self._isdb
+        if node.sids is not None:
+            seq = np.searchsorted(isdb.sid[isdb.offsets[:-1]], node.sids)
+            rows, _ = ranges(isdb.offsets[seq], isdb.offsets[seq + 1])
+            isdb = isdb.take(rows)
+        engine, pdb = Engine(self._gisp, isdb), None
+        for key in path:
+            pdb = self.project(engine, pdb, self.locate(engine, pdb, key))
+        self.grow(node, len(path), engine, pdb)
+
+    def grow(
+            self, node: Node, depth: int, engine: Engine,
+            pdb: Union[Pdb, None]
+    ) -> None:
+        """Reset the border of node and mine subtrees of new children."""
+        min_support = self._gisp._min_support
+        border = {}
+        for key, extension in self.extensions(engine, pdb).items(
+                self._buffer_support):
+            if key in node.children:
+                continue
+            if extension.count >= min_support:
+                child = node.children[key] = Node(
+                    extension.count, extension.result, extension.sids,
+                    self._buffer_support)
+                if self.extensible(depth + 1):
+                    self.grow(
+                        child, depth + 1, engine,
+                        self.project(engine, pdb, extension.positions))
+            elif extension.count >= self._buffer_support:
+                border[key] = extension.count
+        node.border, node.floor = border, self._buffer_support
+
+    def extensible(self, depth: int) -> bool:
+        """Whether patterns of depth elements may be extended."""
+        max_length = self._gisp._max_length
+        return max_length is None or depth < max_length
+
+    def admissible(
+            self, engine: Engine, pdb: Union[Pdb, None]
+    ) -> Tuple[ndarray, ndarray, ndarray, ndarray]:
+        """Return positions of items of the PDB satisfying constraints,
+        with their ISDB rows, itemized intervals and whole intervals.
+
+        The PDB of the root is the whole ISDB, where every item is a head.
+        """
+        gisp, isdb = self._gisp, engine._isdb
+        if pdb is None:
+            rows = np.arange(len(isdb))
+            zeros = np.zeros(len(isdb), dtype=np.int64)
+            return rows, rows, zeros, zeros
+
+        positions = engine.admissible(pdb)
+        if positions is None:
+            positions = np.arange(len(pdb.row))
+        rows = pdb.row[positions]
+        return (
+            positions, rows,
+            np.asarray(gisp._itemize(
+                isdb.interval[rows] - pdb.base[positions])),
+            isdb.interval[rows] - isdb.interval[pdb.head[positions]])
+
+    def extensions(
+            self, engine: Engine, pdb: Union[Pdb, None]
+    ) -> Extensions:
+        """Count every extension occurring in the PDB."""
+        isdb = engine._isdb
+        positions, rows, itemized, whole_interval = self.admissible(
+            engine, pdb)
+        if not len(rows):
+            return NO_EXTENSIONS
+        item = isdb.item[rows]
+        order = np.lexsort((itemized, item))
+        positions, rows, itemized, whole_interval, item = (
+            array[order] for array in (
+                positions, rows, itemized, whole_interval, item))
+
+        # group occurrences by extension, then count distinct sequences by
+        # sorting (group, sequence) pairs
+        first = np.concatenate(([True], (
+            np.diff(item) != 0) | (np.diff(itemized) != 0)))
+        starts, group = np.flatnonzero(first), np.cumsum(first) - 1
+        space = isdb.n_sequences
+        seq = isdb.seq[rows].astype(np.int64)
+        pairs = distinct(group * space + seq)
+        within = whole_interval >= self._gisp._min_whole_interval
+        results = np.bincount(
+            distinct(group[within] * space + seq[within]) // space,
+            minlength=len(starts))
+        counts = np.bincount(pairs // space, minlength=len(starts))
+        sids = isdb.sid[isdb.offsets[pairs % space]]
+
+        return Extensions(
+            list(zip(itemized[starts].tolist(),
+                     isdb.items[item[starts]].tolist())),
+            counts.tolist(), results.tolist(), sids, positions,
+            np.concatenate(([0], np.cumsum(counts))).tolist(),
+            starts.tolist() + [len(positions)])
+
+    def locate(
+            self, engine: Engine, pdb: Union[Pdb, None],
+            key: Tuple[int, str]
+    ) -> ndarray:
+        """Return positions of occurrences of an extension in the PDB."""
+        isdb = engine._isdb
+        positions, rows, itemized, _ = self.admissible(engine, pdb)
+        code = np.searchsorted(isdb.items, key[1])
+        return positions[(isdb.item[rows] == code) & (itemized == key[0])]
+
+    def project(
+            self, engine: Engine, pdb: Union[Pdb, None], positions: ndarray
+    ) -> Pdb:
+        """Project the PDB by occurrences at positions."""
+        isdb = engine._isdb
+        if pdb is None:
+            return engine.truncate(engine.project(
+                positions + 1, isdb.ends[positions],
+                isdb.interval[positions], positions))
+        return engine.project(
+            positions + 1, pdb.end[positions],
+            isdb.interval[pdb.row[positions]], pdb.head[positions], pdb.row)
+
+
+class SlidingWindowMiner(IncrementalMiner):
+    # Keeps the patterns of timestamped events within a sliding window of
+    # time, such as the last 30 days of activity sliding every hour, where
+    # the sequence of a sid is its events in the window with their
+    # timestamps as intervals.
+    #
+    # When the window slides, only sequences of sids with events arriving or
+    # expiring change. Supports in their old versions are subtracted from
+    # the tree of patterns (see `IncrementalMiner`) and supports in their
+    # new versions added, along branches of the tree they occur in only.
+    # Patterns becoming infrequent move to borders with their supports, so
+    # they are mined again once they become frequent. With max_whole_interval
+    # shorter than the window, events of a sid far from the edges of the
+    # window only take part in occurrences the slide keeps, but the sequence
+    # is still counted again as a whole, since supports count sequences.
+
+    def __init__(
+            self, gisp: Gisp, window: int, buffer_support: int = None
+    ) -> None:
+        """
+        Args:
+            gisp: Settings of mining, where top_k, closed and maximal are not
+                supported.
+            window: Length of the window, which keeps events of timestamps in
+                (now - window, now].
+            buffer_support: Minimal support of near-frequent extensions kept
+                in the tree, defaults to half of min_support.
+        """
+        super().__init__(gisp, buffer_support)
+        self._window = window
+        self._now = None  # end of the window
+
+    @property
+    def now(self) -> Union[int, None]:
+        """The end of the window."""
+        return self._now
+
+    def add(self, sequences: Iterable[List[Tuple[int, List[str]]]]) -> None:
+        raise TypeError('events are pushed with their sids and timestamps')
+
+    def push(
+            self, sid: Iterable[int], item: Iterable[str],
+            timestamp: Iterable[int], now: int = None
+    ) -> None:
+        """Add events and slide the window to end at now.
+
+        Args:
+            sid: Sid of each event.
+            item: Item of each event.
+            timestamp: Timestamp of each event, where events already out of
+                the window are dropped.
+            now: The end of the window, defaults to the latest timestamp seen
+                so far. The window never slides back.
+        """
+        builder = IsdbBuilder()
+        builder.add_rows(sid, item, timestamp)
+        arrived = builder.build()
+        ends = [end for end in (self._now, now) if end is not None]
+        if len(arrived):
+            ends.append(arrived.interval.max().item())
+        if not ends:
+            return
+        self._now = max(ends)
+        start = self._now - self._window
+
+        old = self._isdb
+        expired = old.interval <= start
+        changed = distinct(np.concatenate((
+            old.sid[expired], arrived.sid[arrived.interval > start])))
+        if not len(changed):
+            return
+        merged = old.append(arrived) if len(arrived) else old
+        self._isdb = merged.take(merged.interval > start)
+
+        removed = old.take(contains(changed, old.sid))
+        added = self._isdb.take(contains(changed, self._isdb.sid))
+        self.update(
+            self._root, [],
+            (Engine(self._gisp, added), None) if len(added) else None,
+            (Engine(self._gisp, removed), None) if len(removed) else None,
+            changed)
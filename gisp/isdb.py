@@ -0,0 +1,326 @@
+import json
+from array import array
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+from numpy import ndarray
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+
+class Isdb:
+    # A dictionary-encoded, columnar ISDB (interval-extended sequence
+    # database) used by the array-based mining engine.
+    #
+    # Items are encoded to int codes which index into `items`. Since `items`
+    # is sorted, ordering rows by code gives the same order as ordering them
+    # by the item itself. Rows are stored as three contiguous arrays sorted by
+    # sid > interval > item, and `offsets` holds the row range of every
+    # sequence, that is rows of the k-th sequence are
+    # `offsets[k]:offsets[k + 1]`. The sequence [(0, a), (86400, abc)] with
+    # sid 0 would be represented as follow:
+    #
+    #   items = [a, b, c], offsets = [0, 4]
+    #
+    #   sid     item    interval
+    #
+    #   0       0       0
+    #   0       0       86400
+    #   0       1       86400
+    #   0       2       86400
+
+    def __init__(
+            self, sid: ndarray, item: ndarray, interval: ndarray,
+            items: ndarray, offsets: ndarray = None, seq: ndarray = None,
+            ends: ndarray = None
+    ) -> None:
+        self.sid = sid
+        self.item = item
+        self.interval = interval
+        self.items = items
+
+        if offsets is None:
+            boundaries = np.flatnonzero(sid[1:] != sid[:-1]) + 1
+            offsets = np.concatenate(
+                ([0], boundaries, [len(sid)])).astype(np.int64) \
+                if len(sid) else np.zeros(1, dtype=np.int64)
+        self.offsets = offsets
+
+        # sequence index and end of sequence of each row
+        lengths = np.diff(offsets)
+        self.seq = np.repeat(np.arange(len(lengths)), lengths) \
+            if seq is None else seq
+        self.ends = np.repeat(offsets[1:], lengths) if ends is None else ends
+
+    def __len__(self) -> int:
+        return len(self.item)
+
+    @property
+    def n_sequences(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def mapped(self) -> bool:
+        """Whether arrays are memory-mapped from a file."""
+        return isinstance(self.item, np.memmap)
+
+    def save(self, path: str) -> None:
+        """Write the database into a binary file to be opened by `load`.
+
+        The file starts with a magic number and a JSON header holding the
+        item dictionary and the location of every array, followed by the
+        arrays aligned to 64 bytes. Items should be JSON serializable.
+        """
+        arrays = {name: np.ascontiguousarray(getattr(self, name))
+                  for name in ARRAYS}
+        specs, offset = {}, 0
+        for name, array in arrays.items():
+            specs[name] = {
+                'dtype': array.dtype.str, 'shape': len(array),
+                'offset': offset}
+            offset = align(offset + array.nbytes)
+        header = json.dumps({
+            'version': FORMAT_VERSION,
+            'items': self.items.tolist(),
+            'arrays': specs,
+        }).encode()
+        start = align(len(MAGIC) + 8 + len(header))
+
+        with open(path, 'wb') as file:
+            file.write(MAGIC)
+            file.write(len(header).to_bytes(8, 'little'))
+            file.write(header)
+            for name, array in arrays.items():
+                file.seek(start + specs[name]['offset'])
+                array.tofile(file)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'Isdb':
+        """Open a database written by `save`.
+
+        Args:
+            path: Path of the file.
+            mmap: Map arrays from the file with `numpy.memmap` instead of
+                reading them, so that the OS page cache holds only what is
+                being mined and databases larger than memory can be mined.
+        """
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{path} is not an ISDB file')
+            length = int.from_bytes(file.read(8), 'little')
+            header = json.loads(file.read(length))
+        if header['version'] != FORMAT_VERSION:
+            raise ValueError(
+                f'unsupported ISDB file version {header["version"]}')
+        start = align(len(MAGIC) + 8 + length)
+
+        arrays = {}
+        for name, spec in header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            if mmap and spec['shape']:
+                arrays[name] = np.memmap(
+                    path, dtype=dtype, mode='r',
+                    offset=start + spec['offset'], shape=spec['shape'])
+            else:
+                arrays[name] = np.fromfile(
+                    path, dtype=dtype, count=spec['shape'],
+                    offset=start + spec['offset'])
+        items = np.empty(len(header['items']), dtype=object)
+        items[:] = header['items']
+        return cls(items=items, **arrays)
+
+    @classmethod
+    def from_rows(
+            cls, sid: Iterable[int], item: Iterable[Any],
+            interval: Iterable[int]
+    ) -> 'Isdb':
+        """Encode and sort (sid, item, interval) rows."""
+        interval = np.asarray(interval)
+        if interval.dtype == object or len(interval) == 0:
+            interval = interval.astype(np.int64)
+        items, item = np.unique(
+            np.asarray(item, dtype=object), return_inverse=True)
+        return cls.from_codes(
+            np.asarray(sid, dtype=np.int64), item.astype(np.int32), interval,
+            items)
+
+    @classmethod
+    def from_codes(
+            cls, sid: ndarray, item: ndarray, interval: ndarray,
+            items: ndarray
+    ) -> 'Isdb':
+        """Build from encoded rows, which are sorted unless already ordered.
+        """
+        if not is_ordered(sid, item, interval):
+            order = np.lexsort((item, interval, sid))
+            sid, item, interval = sid[order], item[order], interval[order]
+        return cls(sid, item, interval, items)
+
+    @classmethod
+    def from_sequences(
+            cls, sequences: Iterable[List[Tuple[int, List[str]]]]) -> 'Isdb':
+        """Encode sequences, the same input as `Gisp.transform`.
+
+        Sequences may be any iterator, which is consumed one at a time.
+        """
+        builder = IsdbBuilder()
+        for sequence in sequences:
+            builder.add_sequence(sequence)
+        return builder.build()
+
+    @classmethod
+    def from_batches(cls, batches: Iterable[Any]) -> 'Isdb':
+        """Encode batches of rows with columns sid, item and interval.
+
+        Batches may be DataFrames from `pandas.read_csv(..., chunksize=n)`,
+        Arrow record batches from `ParquetFile.iter_batches()`, or anything
+        else indexable by column names. Rows of a sid should not be split
+        across batches out of order, since the rows are only sorted if they
+        are not already ordered by sid > interval > item as a whole.
+        """
+        builder = IsdbBuilder()
+        for batch in batches:
+            builder.add_rows(batch['sid'], batch['item'], batch['interval'])
+        return builder.build()
+
+    @classmethod
+    def from_frame(cls, isdb: 'DataFrame') -> 'Isdb':
+        """Encode an ISDB in DataFrame returned by `Gisp.transform`."""
+        return cls.from_rows(
+            isdb['sid'].to_numpy(), isdb['item'].to_numpy(),
+            isdb['interval'].to_numpy())
+
+    def take(self, mask: ndarray) -> 'Isdb':
+        """Select rows by a boolean mask, keeping the item dictionary."""
+        return Isdb(
+            self.sid[mask], self.item[mask], self.interval[mask], self.items)
+
+    def append(self, other: 'Isdb') -> 'Isdb':
+        """Append rows of another database, merging item dictionaries.
+
+        Rows are only sorted again if sids of other do not follow ours, and
+        only by sid if the sids of both do not overlap.
+        """
+        items = np.unique(np.concatenate((self.items, other.items)))
+        item = np.concatenate((
+            np.searchsorted(items, self.items).astype(np.int32)[self.item],
+            np.searchsorted(items, other.items).astype(np.int32)[other.item]))
+        sid = np.concatenate((self.sid, other.sid))
+        interval = np.concatenate((self.interval, other.interval))
+        if not is_ordered(sid, item, interval):
+            # both are ordered, so a stable sort by sid orders sequences of
+            # either one
+            order = np.argsort(sid, kind='stable')
+            sid, item, interval = sid[order], item[order], interval[order]
+        return Isdb.from_codes(sid, item, interval, items)
+
+    def keep_items(self, codes: ndarray) -> 'Isdb':
+        """Drop rows of items other than the codes."""
+        mask = np.isin(self.item, codes)
+        return self if mask.all() else self.take(mask)
+
+    def to_frame(self) -> 'DataFrame':
+        """Decode into an ISDB in DataFrame."""
+        from pandas import DataFrame
+        return DataFrame({
+            'sid': self.sid,
+            'item': self.items[self.item],
+            'interval': self.interval,
+        })
+
+
+# binary file format of `Isdb.save`
+MAGIC = b'GISPISDB'
+FORMAT_VERSION = 1
+ARRAYS = ['sid', 'item', 'interval', 'offsets', 'seq', 'ends']
+
+
+def align(offset: int, alignment: int = 64) -> int:
+    return -(-offset // alignment) * alignment
+
+
+class IsdbBuilder:
+    # Builds an `Isdb` incrementally, so that input can be streamed from disk
+    # without holding the whole input and the database at once.
+    #
+    # Rows are appended to typed buffers, and items are encoded in order of
+    # appearance, which are re-coded in sorted order when the database is
+    # built. Building hands the buffers over to the database and empties the
+    # builder.
+
+    def __init__(self) -> None:
+        self._sid = array('q')
+        self._item = array('i')
+        self._interval = array('q')
+        self._codes: Dict[Any, int] = {}
+        self._n_sequences = 0  # sid of the next sequence added
+
+    def add_sequence(
+            self, sequence: List[Tuple[int, List[str]]], sid: int = None
+    ) -> None:
+        """Add a sequence of (interval, items), whose sid defaults to the
+        number of sequences added so far."""
+        if sid is None:
+            sid = self._n_sequences
+        self._n_sequences = sid + 1
+
+        rows = sorted(
+            (interval, item) for interval, items in sequence
+            for item in items)
+        codes = self._codes
+        for interval, item in rows:
+            if isinstance(interval, float) and self._interval.typecode == 'q':
+                self._interval = array('d', self._interval)
+            self._sid.append(sid)
+            self._item.append(codes.setdefault(item, len(codes)))
+            self._interval.append(interval)
+
+    def add_rows(
+            self, sid: Iterable[int], item: Iterable[Any],
+            interval: Iterable[int]
+    ) -> None:
+        """Add a batch of (sid, item, interval) rows."""
+        sid = np.asarray(sid, dtype=np.int64)
+        interval = np.asarray(interval)
+        labels, item = np.unique(
+            np.asarray(item, dtype=object), return_inverse=True)
+        codes = self._codes
+        recode = np.array([codes.setdefault(label, len(codes))
+                           for label in labels.tolist()], dtype=np.int32)
+
+        if interval.dtype.kind == 'f' and self._interval.typecode == 'q':
+            self._interval = array('d', self._interval)
+        self._sid.frombytes(sid.tobytes())
+        self._item.frombytes(recode[item].astype(np.int32).tobytes())
+        self._interval.frombytes(interval.astype(
+            np.float64 if self._interval.typecode == 'd' else np.int64
+        ).tobytes())
+        if len(sid):
+            self._n_sequences = max(self._n_sequences, int(sid.max()) + 1)
+
+    def build(self) -> Isdb:
+        """Build the database from rows added so far."""
+        labels = np.empty(len(self._codes), dtype=object)
+        labels[:] = list(self._codes)
+        order = np.argsort(labels, kind='stable')
+        recode = np.empty(len(order), dtype=np.int32)
+        recode[order] = np.arange(len(order), dtype=np.int32)
+
+        interval_dtype = (
+            np.float64 if self._interval.typecode == 'd' else np.int64)
+        sid = np.frombuffer(self._sid, dtype=np.int64)
+        item = recode[np.frombuffer(self._item, dtype=np.int32)]
+        interval = np.frombuffer(self._interval, dtype=interval_dtype)
+        self.__init__()
+        return Isdb.from_codes(sid, item, interval, labels[order])
+
+
+def is_ordered(sid: ndarray, item: ndarray, interval: ndarray) -> bool:
+    """Check whether rows are ordered by sid > interval > item."""
+    sid_diff = np.diff(sid)
+    interval_diff = np.diff(interval)
+    return bool(np.all(
+        (sid_diff > 0) | (sid_diff == 0) & (
+            (interval_diff > 0)
+            | (interval_diff == 0) & (np.diff(item) >= 0))))
@@ -0,0 +1,109 @@
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Sequence, Union
+
+import numpy as np
+from numpy import ndarray
+
+
+class Itemizer(ABC):
+    # Converting function from interval to pseudo counts, which takes either
+    # an interval or an array of intervals at once.
+
+    @abstractmethod
+    def __call__(self, interval: Union[int, ndarray]) -> Union[int, ndarray]:
+        pass
+
+
+class FixedWidth(Itemizer):
+    # Buckets of fixed width, e.g. FixedWidth(86400) counts days as
+    # `lambda i: i // 86400` does.
+
+    def __init__(self, width: int) -> None:
+        self.width = width
+
+    def __call__(self, interval: Union[int, ndarray]) -> Union[int, ndarray]:
+        return interval // self.width
+
+
+class Log2(Itemizer):
+    # Logarithmic buckets, e.g. Log2() is `lambda i: int(log2(i + 1))`, and
+    # Log2(60) counts int(log2(i / 60 + 1)).
+
+    def __init__(self, width: int = 1) -> None:
+        self.width = width
+
+    def __call__(self, interval: Union[int, ndarray]) -> Union[int, ndarray]:
+        # the exponent of frexp is exact, unlike flooring a float log2
+        _, exponent = np.frexp(np.asarray(interval) / self.width + 1)
+        itemized = exponent.astype(np.int64) - 1
+        return itemized if np.ndim(interval) else int(itemized)
+
+
+class Breakpoints(Itemizer):
+    # Buckets separated by ascending breakpoints, where the pseudo count of
+    # an interval is the number of breakpoints not greater than it, e.g.
+    # Breakpoints([60, 3600]) maps [0, 60) to 0, [60, 3600) to 1 and
+    # [3600, inf) to 2.
+
+    def __init__(self, breakpoints: Sequence[int]) -> None:
+        self.breakpoints = np.asarray(breakpoints)
+
+    def __call__(self, interval: Union[int, ndarray]) -> Union[int, ndarray]:
+        itemized = np.searchsorted(self.breakpoints, interval, side='right')
+        return itemized if np.ndim(interval) else int(itemized)
+
+
+class Function(Itemizer):
+    # Wrapper of an arbitrary itemizing function. It is called on whole
+    # arrays if it turns out to accept them, for example
+    # `lambda i: i // 86400`, or otherwise once per distinct interval with
+    # results memorized.
+
+    def __init__(self, function: Callable[[int], int]) -> None:
+        self.function = function
+        self._vectorized = None  # whether function accepts arrays
+        self._memo: Dict[Any, int] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # do not ship the memo to worker processes
+        state = self.__dict__.copy()
+        state['_memo'] = {}
+        return state
+
+    def __call__(self, interval: Union[int, ndarray]) -> Union[int, ndarray]:
+        if not np.ndim(interval):
+            return self.itemize(interval)
+
+        interval = np.asarray(interval)
+        if self._vectorized is None and len(interval):
+            self._vectorized = self.accepts_arrays(interval[:16])
+        if self._vectorized:
+            return np.asarray(self.function(interval))
+
+        values, inverse = np.unique(interval, return_inverse=True)
+        itemized = np.array([self.itemize(v) for v in values.tolist()])
+        return itemized[inverse]
+
+    def itemize(self, interval: int) -> int:
+        if interval not in self._memo:
+            self._memo[interval] = self.function(interval)
+        return self._memo[interval]
+
+    def accepts_arrays(self, sample: ndarray) -> bool:
+        """Check whether function gives the same results on a whole array."""
+        try:
+            itemized = self.function(sample)
+        except Exception:
+            return False
+        if not isinstance(itemized, ndarray) \
+                or itemized.shape != sample.shape:
+            return False
+        return itemized.tolist() == [
+            self.function(i) for i in sample.tolist()]
+
+
+def vectorize(itemize: Callable[[int], int]) -> Itemizer:
+    """Return itemize as an Itemizer taking arrays of intervals."""
+    if isinstance(itemize, Itemizer):
+        return itemize
+    return Function(itemize)
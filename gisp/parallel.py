@@ -0,0 +1,164 @@
+import os
+import pickle
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice, repeat
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator, List, NamedTuple, Tuple
+
+import numpy as np
+
+from .engine import Engine, select_top
+from .gisp import Gisp, Pattern
+from .isdb import Isdb
+from .stats import Stats
+
+
+class SharedIsdb(NamedTuple):
+
+    # Location of an ISDB copied into a shared memory block, which is all a
+    # task ships to workers. The block holds arrays sid, interval and item
+    # followed by the pickled item dictionary.
+    name: str
+    length: int  # number of rows
+    interval_dtype: str
+
+
+# ISDB attached by a worker process, kept across its tasks
+_attached: Tuple[SharedMemory, Isdb] = None
+
+
+def share(isdb: Isdb) -> Tuple[SharedMemory, SharedIsdb]:
+    """Copy the ISDB into a new shared memory block."""
+    items = pickle.dumps(isdb.items, protocol=pickle.HIGHEST_PROTOCOL)
+    arrays = [isdb.sid.astype(np.int64), isdb.interval,
+              isdb.item.astype(np.int32)]
+    shm = SharedMemory(
+        create=True, size=sum(a.nbytes for a in arrays) + len(items))
+
+    offset = 0
+    for array in arrays:
+        shm.buf[offset:offset + array.nbytes] = array.tobytes()
+        offset += array.nbytes
+    shm.buf[offset:offset + len(items)] = items
+    return shm, SharedIsdb(shm.name, len(isdb), isdb.interval.dtype.str)
+
+
+def attach(shared: SharedIsdb) -> Isdb:
+    """Attach the ISDB in shared memory without copying its arrays."""
+    global _attached
+    if _attached is not None and _attached[0].name == shared.name:
+        return _attached[1]
+
+    if _attached is not None:
+        # arrays must be released before closing the block they view
+        previous, _attached = _attached[0], None
+        previous.close()
+
+    shm = SharedMemory(shared.name)
+
+    offset, arrays = 0, []
+    for dtype in [np.dtype(np.int64), np.dtype(shared.interval_dtype),
+                  np.dtype(np.int32)]:
+        arrays.append(np.ndarray(
+            shared.length, dtype=dtype, buffer=shm.buf, offset=offset))
+        offset += shared.length * dtype.itemsize
+    items = pickle.loads(shm.buf[offset:])
+
+    sid, interval, item = arrays
+    isdb = Isdb(sid, item, interval, items)
+    _attached = (shm, isdb)
+    return isdb
+
+
+def mine_task(
+        gisp: Gisp, shared: SharedIsdb, code: int, count: int,
+        shard: Tuple[int, int]
+) -> Tuple[List[Pattern], Stats]:
+    """Mine patterns headed by an item in a worker process."""
+    stats = Stats()
+    engine = Engine(gisp, attach(shared), gisp._pseudo_projection, stats)
+    # the top patterns of all are among the top patterns of each task
+    return select_top(
+        list(engine.iter_item_patterns(code, count, shard)),
+        gisp._top_k), stats
+
+
+def mine(
+        gisp: Gisp, isdb: Isdb, n_jobs: int = None, split_level: int = 1,
+        executor: Executor = None, stats: Stats = None
+) -> List[Pattern]:
+    """Mine the ISDB by distributing subtrees of items to processes.
+
+    Patterns are returned in the same order as mining in one process.
+
+    Args:
+        gisp: Settings of mining, where itemize must be picklable.
+        isdb: The encoded ISDB, which is shipped once via shared memory.
+        n_jobs: Number of worker processes, defaults to the number of CPUs.
+        split_level: 1 to make a task per frequent item, or 2 to further
+            split the subtree of each item into n_jobs tasks by its frequent
+            extensions.
+        executor: An executor of processes to run tasks instead of a new
+            ProcessPoolExecutor.
+        stats: A `Stats` to add up costs of every task into. The peak
+            memory is the largest one of a task, and callbacks are not called.
+    """
+    return list(iter_patterns(
+        gisp, isdb, n_jobs, split_level, executor, stats))
+
+
+def iter_patterns(
+        gisp: Gisp, isdb: Isdb, n_jobs: int = None, split_level: int = 1,
+        executor: Executor = None, stats: Stats = None
+) -> Iterator[Pattern]:
+    """Yield patterns of `mine` as soon as the tasks of an item are done.
+
+    Every task is submitted at once, and the shared memory is released when
+    the iteration is complete or closed.
+    """
+    if split_level not in (1, 2):
+        raise ValueError(f'split_level should be 1 or 2, got {split_level}')
+    n_jobs = n_jobs or os.cpu_count()
+    n_shards = n_jobs if split_level == 2 else 1
+
+    codes, counts = Engine(gisp, isdb, stats=stats).frequent_items()
+    if not isdb.mapped:
+        isdb = isdb.keep_items(codes)
+    tasks = [(code, count, (k, n_shards))
+             for code, count in zip(codes.tolist(), counts.tolist())
+             for k in range(n_shards)]
+
+    if not tasks:
+        return
+
+    shm, shared = share(isdb)
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(n_jobs)
+    try:
+        results = executor.map(
+            mine_task, repeat(gisp), repeat(shared), *zip(*tasks))
+        patterns = []  # of all items with top_k
+        for _ in range(len(tasks) // n_shards):
+            subtree = []
+            for result, task_stats in islice(results, n_shards):
+                subtree.extend(result)
+                if stats is not None:
+                    stats.merge(task_stats)
+            if n_shards > 1:
+                # restore the depth-first order, where the item itself comes
+                # first and subtrees of its extensions are ordered by (item,
+                # itemized_interval) of their second element
+                subtree.sort(
+                    key=lambda p: (p.sequence[1][1], p.sequence[1][0])
+                    if len(p.sequence) > 1 else ())
+            if gisp._top_k is None:
+                yield from subtree
+            else:
+                patterns.extend(subtree)
+        yield from select_top(patterns, gisp._top_k)
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+        shm.close()
+        shm.unlink()
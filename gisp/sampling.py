@@ -0,0 +1,231 @@
+from math import ceil, floor, sqrt
+from statistics import NormalDist
+from typing import Dict, List, NamedTuple, Tuple, Union
+
+import numpy as np
+from numpy import ndarray
+
+from .engine import Engine, Node, count_distinct
+from .gisp import Gisp
+from .isdb import Isdb
+
+
+class Estimate(NamedTuple):
+
+    # A pattern mined from a sample of sequences, with its support in the
+    # whole ISDB estimated within a confidence interval, which is exact
+    # (lower == support == upper) once verified.
+    sequence: List[Tuple[int, str]]
+    support: int  # estimated support in the whole ISDB
+    lower: int  # lower confidence bound of support
+    upper: int  # upper confidence bound of support
+
+
+class Trie:
+    # Prefix tree of candidate patterns, whose supports are counted in one
+    # depth-first pass by `count`.
+
+    def __init__(self) -> None:
+        self.children: Dict[Tuple[int, str], Trie] = {}
+        self.patterns: List[int] = []  # indices of patterns ending here
+
+    def insert(self, sequence: List[Tuple[int, str]], index: int) -> None:
+        node = self
+        for element in sequence:
+            node = node.children.setdefault(element, Trie())
+        node.patterns.append(index)
+
+    def codes(self, items: ndarray) -> ndarray:
+        """Return codes of items of children found in the item dictionary,
+        which are the only extensions to be counted."""
+        labels = sorted({item for _, item in self.children})
+        codes = np.searchsorted(items, labels)
+        found = codes < len(items)
+        codes = codes[found]
+        return codes[items[codes] == np.array(labels, dtype=object)[found]]
+
+
+def sample(isdb: Isdb, fraction: float, seed: int = None) -> Isdb:
+    """Return a uniform random sample of sequences of the ISDB without
+    replacement, taking round(fraction * n_sequences) of them."""
+    rng = np.random.default_rng(seed)
+    size = round(fraction * isdb.n_sequences)
+    selected = np.zeros(isdb.n_sequences, dtype=bool)
+    selected[rng.choice(isdb.n_sequences, size, replace=False)] = True
+    return isdb.take(selected[isdb.seq])
+
+
+def sample_support(
+        min_support: int, n_sequences: int, size: int, confidence: float
+) -> int:
+    """Lower min_support of n_sequences to the support a sample of size
+    sequences should mine at.
+
+    A pattern of support min_support occurs in a binomial number of sampled
+    sequences, which falls below the returned support with probability
+    1 - confidence at most by the normal approximation. Sampling without
+    replacement only varies less.
+    """
+    p = min(1.0, min_support / n_sequences)
+    z = NormalDist().inv_cdf(confidence)
+    return max(1, floor(size * p - z * sqrt(size * p * (1 - p))))
+
+
+def bounds(
+        support: int, n_sequences: int, size: int, confidence: float
+) -> Tuple[int, int, int]:
+    """Estimate the support of a pattern in n_sequences from its support in
+    a sample of size sequences.
+
+    Returns:
+        The scaled support and the Wilson score interval of the confidence,
+        where the support is never below the sampled one, nor above it by
+        more than the sequences out of the sample.
+    """
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    denominator = size + z * z
+    center = (support + z * z / 2) / denominator
+    half = z / denominator * sqrt(
+        support * (size - support) / size + z * z / 4)
+    return (
+        round(support * n_sequences / size),
+        max(support, floor((center - half) * n_sequences)),
+        min(support + n_sequences - size,
+            ceil((center + half) * n_sequences)))
+
+
+def count(
+        gisp: Gisp, isdb: Isdb, sequences: List[List[Tuple[int, str]]]
+) -> List[int]:
+    """Count supports of patterns in the ISDB in a single pass.
+
+    Patterns are merged into a prefix tree, and the engine projects and
+    counts the PDB of every node of the tree once, reading supports of all
+    the patterns extending it at once, instead of mining the whole ISDB.
+
+    Returns:
+        Support of every pattern under the constraints of gisp, 0 if it
+        never occurs.
+    """
+    trie = Trie()
+    for index, sequence in enumerate(sequences):
+        trie.insert(sequence, index)
+    supports = [0] * len(sequences)
+    engine = Engine(gisp, isdb, gisp._pseudo_projection)
+
+    codes, counts = count_distinct(isdb.seq, isdb.item)
+    item_counts = dict(zip(codes.tolist(), counts.tolist()))
+    for (interval, item), child in trie.children.items():
+        code = np.searchsorted(isdb.items, item).item()
+        if interval != 0 or code == len(isdb.items) \
+                or isdb.items[code] != item:
+            continue
+        if gisp._min_whole_interval == 0:
+            for index in child.patterns:
+                supports[index] = item_counts.get(code, 0)
+        if child.children:
+            prefix = [(interval, item)]
+            pdb = engine.project_item(engine.item_rows(code))
+            count_children(
+                engine, prefix,
+                engine.count_node(prefix, pdb, child.codes(isdb.items)),
+                child, supports)
+    return supports
+
+
+def count_children(
+        engine: Engine, prefix: List[Tuple[int, str]], node: Node,
+        trie: Trie, supports: List[int]
+) -> None:
+    """Count supports of patterns of the children of a node of the trie."""
+    isdb = engine._isdb
+    for element, child in trie.children.items():
+        interval, item = element
+        extension = locate(isdb.items, node, interval, item)
+        if extension is None:
+            continue
+        at = np.searchsorted(node.keys, extension).item()
+        if at == len(node.keys) or node.keys[at] != extension:
+            continue
+        for index in child.patterns:
+            supports[index] = node.results[at].item()
+        if child.children:
+            subprefix = prefix + [element]
+            count_children(
+                engine, subprefix,
+                engine.count_node(
+                    subprefix, engine.project_child(node, extension),
+                    child.codes(isdb.items)),
+                child, supports)
+
+
+def locate(
+        items: ndarray, node: Node, interval: int, item: str
+) -> Union[int, None]:
+    """Return the extension code of (interval, item) in a node, None if no
+    item of the node is itemized into interval."""
+    code = np.searchsorted(items, item).item()
+    value = np.searchsorted(node.values, interval).item()
+    if code == len(items) or items[code] != item \
+            or value == len(node.values) or node.values[value] != interval:
+        return None
+    return code * len(node.values) + value
+
+
+def mine(
+        gisp: Gisp, isdb: Isdb, fraction: float, confidence: float = 0.95,
+        verify: bool = False, seed: int = None
+) -> List[Estimate]:
+    """Mine a random sample of sequences instead of the whole ISDB.
+
+    The sample of a fraction of sequences is mined at a lowered minimal
+    support (see `sample_support`), so that a pattern frequent in the whole
+    ISDB is missed with probability 1 - confidence at most. Its support is
+    then estimated with a confidence interval (see `bounds`), keeping the
+    patterns whose upper bound reaches min_support. With verify, supports
+    of those candidates are counted exactly in the whole ISDB in a single
+    pass (see `count`), keeping the frequent ones only.
+
+    Args:
+        gisp: Settings of mining, where top_k, closed and maximal are not
+            supported, since the sample does not preserve them.
+        isdb: The whole ISDB.
+        fraction: Fraction of sequences sampled, in (0, 1].
+        confidence: Confidence of not missing a frequent pattern, and of
+            the bounds of supports.
+        verify: Count exact supports of candidates in the whole ISDB.
+        seed: Seed of the sample.
+
+    Returns:
+        Estimated patterns in the order `Gisp.mine` would yield them.
+    """
+    if gisp._top_k is not None or gisp._closed or gisp._maximal:
+        raise ValueError('top_k, closed and maximal are not supported')
+    if not 0 < fraction <= 1:
+        raise ValueError(f'fraction {fraction} is not in (0, 1]')
+    n_sequences = isdb.n_sequences
+    sampled = sample(isdb, fraction, seed)
+    size = sampled.n_sequences
+    if not size:
+        return []
+
+    # without the cache, whose entries point into the whole ISDB
+    lowered = gisp.replace(min_support=sample_support(
+        gisp._min_support, n_sequences, size, confidence), cache=None)
+    estimates = [
+        Estimate(pattern.sequence, *bounds(
+            pattern.support, n_sequences, size, confidence))
+        for pattern in lowered.iter_patterns(sampled)]
+    estimates = [
+        estimate for estimate in estimates
+        if estimate.upper >= gisp._min_support]
+    if not verify:
+        return estimates
+
+    supports = count(
+        gisp, isdb, [estimate.sequence for estimate in estimates])
+    return [
+        Estimate(estimate.sequence, support, support, support)
+        for estimate, support in zip(estimates, supports)
+        if support >= gisp._min_support]
+
@@ -0,0 +1,112 @@
+from typing import Any, Callable, Dict, List, Tuple
+
+
+PHASES = ['project', 'itemize', 'count']
+
+
+class LevelStats:
+    # Costs of one level of the search, that is of PDBs projected by
+    # patterns of the same length, where level 0 is counting items of the
+    # ISDB itself.
+
+    def __init__(self) -> None:
+        self.projections = 0  # number of PDBs
+        self.rows = 0  # total number of rows of PDBs
+        self.max_rows = 0  # rows of the largest PDB
+        self.peak_bytes = 0  # memory of the largest PDB
+        self.seconds = dict.fromkeys(PHASES, 0.0)  # time per phase
+
+    def merge(self, other: 'LevelStats') -> None:
+        self.projections += other.projections
+        self.rows += other.rows
+        self.max_rows = max(self.max_rows, other.max_rows)
+        self.peak_bytes = max(self.peak_bytes, other.peak_bytes)
+        for phase, seconds in other.seconds.items():
+            self.seconds[phase] += seconds
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'projections': self.projections,
+            'rows': self.rows,
+            'max_rows': self.max_rows,
+            'peak_bytes': self.peak_bytes,
+            **{f'{phase}_seconds': seconds
+               for phase, seconds in self.seconds.items()},
+        }
+
+
+class Stats:
+    # Instrumentation of a mining run, filled in by `Gisp.mine(isdb, stats)`.
+    #
+    # Costs are recorded per level (see `LevelStats`): time of projecting
+    # PDBs of the level, and time of itemizing intervals and counting
+    # extensions in them. Peak memory is the largest sum of PDBs alive at
+    # once along the search path. If a callback is given, it is called as
+    # callback(prefix, rows, seconds) for every PDB after its extensions are
+    # counted, with the time itemizing and counting it took, so that
+    # expensive prefixes can be found while mining.
+
+    def __init__(
+            self, callback: Callable[[List[Tuple[int, str]], int, float],
+                                     None] = None
+    ) -> None:
+        self.levels: Dict[int, LevelStats] = {}
+        self.peak_bytes = 0
+        self.callback = callback
+        self._live_bytes = 0  # PDBs along the current search path
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # callbacks stay in the process calling them
+        state = self.__dict__.copy()
+        state['callback'] = None
+        return state
+
+    def level(self, level: int) -> LevelStats:
+        if level not in self.levels:
+            self.levels[level] = LevelStats()
+        return self.levels[level]
+
+    def add_time(self, level: int, phase: str, seconds: float) -> None:
+        self.level(level).seconds[phase] += seconds
+
+    def enter(self, level: int, rows: int, nbytes: int) -> None:
+        """Record a PDB of the level which is being mined."""
+        stats = self.level(level)
+        stats.projections += 1
+        stats.rows += rows
+        stats.max_rows = max(stats.max_rows, rows)
+        stats.peak_bytes = max(stats.peak_bytes, nbytes)
+        self.allocate(nbytes)
+
+    def allocate(self, nbytes: int) -> None:
+        """Record memory of PDBs becoming alive."""
+        self._live_bytes += nbytes
+        self.peak_bytes = max(self.peak_bytes, self._live_bytes)
+
+    def release(self, nbytes: int) -> None:
+        """Record memory of PDBs being released."""
+        self._live_bytes -= nbytes
+
+    def node(
+            self, prefix: List[Tuple[int, str]], rows: int, seconds: float
+    ) -> None:
+        if self.callback is not None:
+            self.callback(prefix, rows, seconds)
+
+    def merge(self, other: 'Stats') -> None:
+        """Add the costs of another run, e.g. of a worker process."""
+        for level, stats in other.levels.items():
+            self.level(level).merge(stats)
+        self.peak_bytes = max(self.peak_bytes, other.peak_bytes)
+
+    def summary(self) -> Dict[str, Any]:
+        """Return costs as a structure of plain values."""
+        levels = [{'level': level, **self.levels[level].summary()}
+                  for level in sorted(self.levels)]
+        return {
+            'levels': levels,
+            'peak_bytes': self.peak_bytes,
+            **{f'{phase}_seconds': sum(
+                stats.seconds[phase] for stats in self.levels.values())
+               for phase in PHASES},
+        }
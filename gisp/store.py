@@ -0,0 +1,190 @@
+from array import array
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+from numpy import ndarray
+
+from .gisp import Pattern
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+
+class PatternStore:
+    # A compact store of mined patterns as a prefix tree in flat arrays,
+    # taking 28 bytes per node instead of a list of tuples per pattern.
+    #
+    # Node k is the element (interval[k], items[item[k]]) appended to the
+    # pattern of node parent[k], where the parent -1 is the empty pattern,
+    # and support[k] is the support of the pattern of node k, or -1 if it is
+    # only a prefix of stored patterns. Patterns are the nodes with supports,
+    # in the order they are stored. Patterns are streamed in depth-first
+    # order by `Gisp.iter_patterns`, so a pattern mostly adds a single node
+    # to the prefix of the pattern before, e.g.
+    #
+    #   PatternStore.from_patterns(gisp.iter_patterns(isdb))
+    #
+    # never holds more than one `Pattern` at a time. Items are encoded in
+    # order of appearance. Patterns are converted back to `Pattern` on
+    # demand, and the tree is exported as a table with a categorical item
+    # column by `to_frame` or `to_arrow`. Array properties are copies, as
+    # the buffers grow while patterns are stored.
+
+    def __init__(self) -> None:
+        self._parent = array('q')
+        self._item = array('i')
+        self._interval = array('q')
+        self._support = array('q')
+        self._codes: Dict[Any, int] = {}
+        self._labels: List[Any] = []  # items indexed by codes
+        # (element, node) of the last pattern stored, for sharing prefixes
+        self._path: List[Tuple[Tuple[int, str], int]] = []
+        self._patterns = None  # nodes of patterns, built on demand
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def __iter__(self) -> Iterator[Pattern]:
+        for node in self.patterns.tolist():
+            yield Pattern(self.sequence(node), self._support[node])
+
+    def __getitem__(self, index: int) -> Pattern:
+        node = self.patterns[index].item()
+        return Pattern(self.sequence(node), self._support[node])
+
+    @property
+    def parent(self) -> ndarray:
+        return np.frombuffer(self._parent, dtype=np.int64).copy()
+
+    @property
+    def item(self) -> ndarray:
+        return np.frombuffer(self._item, dtype=np.int32).copy()
+
+    @property
+    def interval(self) -> ndarray:
+        return np.frombuffer(self._interval, dtype=(
+            np.float64 if self._interval.typecode == 'd' else np.int64)).copy()
+
+    @property
+    def support(self) -> ndarray:
+        return np.frombuffer(self._support, dtype=np.int64).copy()
+
+    @property
+    def items(self) -> ndarray:
+        items = np.empty(len(self._labels), dtype=object)
+        items[:] = self._labels
+        return items
+
+    @property
+    def patterns(self) -> ndarray:
+        """Nodes of patterns in the order they were stored."""
+        if self._patterns is None:
+            self._patterns = np.flatnonzero(self.support >= 0)
+        return self._patterns
+
+    @property
+    def nbytes(self) -> int:
+        return sum(buffer.itemsize * len(buffer) for buffer in (
+            self._parent, self._item, self._interval, self._support))
+
+    @classmethod
+    def from_patterns(cls, patterns: Iterable[Pattern]) -> 'PatternStore':
+        store = cls()
+        store.extend(patterns)
+        return store
+
+    def extend(self, patterns: Iterable[Pattern]) -> None:
+        for pattern in patterns:
+            self.append(pattern)
+
+    def append(self, pattern: Pattern) -> None:
+        """Store a pattern, sharing nodes of its prefix with the pattern
+        stored before."""
+        sequence, path = pattern.sequence, self._path
+        # the pattern itself always gets a new node, so that patterns stay
+        # in order even if its prefix was stored before
+        common = 0
+        while common < min(len(path), len(sequence) - 1) \
+                and path[common][0] == sequence[common]:
+            common += 1
+        del path[common:]
+        for index, element in enumerate(sequence[common:], common):
+            last = index == len(sequence) - 1
+            node = self.add_node(
+                path[-1][1] if path else -1, element,
+                pattern.support if last else -1)
+            path.append((element, node))
+        self._patterns = None
+
+    def add_node(
+            self, parent: int, element: Tuple[int, str], support: int
+    ) -> int:
+        interval, item = element
+        if isinstance(interval, float) and self._interval.typecode == 'q':
+            self._interval = array('d', self._interval)
+        self._parent.append(parent)
+        code = self._codes.get(item)
+        if code is None:
+            code = self._codes[item] = len(self._labels)
+            self._labels.append(item)
+        self._item.append(code)
+        self._interval.append(interval)
+        self._support.append(support)
+        return len(self._parent) - 1
+
+    def sequence(self, node: int) -> List[Tuple[int, str]]:
+        """Return the elements of the pattern of a node."""
+        sequence = []
+        while node >= 0:
+            sequence.append(
+                (self._interval[node], self._labels[self._item[node]]))
+            node = self._parent[node]
+        sequence.reverse()
+        return sequence
+
+    def to_patterns(self) -> List[Pattern]:
+        return list(self)
+
+    def to_frame(self) -> 'DataFrame':
+        """Return the nodes as a DataFrame with columns parent, item,
+        interval and support, indexed by node."""
+        from pandas import Categorical, DataFrame
+        return DataFrame({
+            'parent': self.parent,
+            'item': Categorical.from_codes(self.item, self.items),
+            'interval': self.interval,
+            'support': self.support,
+        })
+
+    @classmethod
+    def from_frame(cls, frame: 'DataFrame') -> 'PatternStore':
+        """Read nodes returned by `to_frame`."""
+        from pandas import Categorical
+        store = cls()
+        item = Categorical(frame['item'])
+        store._labels = item.categories.tolist()
+        store._codes = {
+            label: code for code, label in enumerate(store._labels)}
+        store._parent.frombytes(
+            frame['parent'].to_numpy(dtype=np.int64).tobytes())
+        store._item.frombytes(item.codes.astype(np.int32).tobytes())
+        interval = frame['interval'].to_numpy()
+        if interval.dtype.kind == 'f':
+            store._interval = array('d')
+            store._interval.frombytes(interval.astype(np.float64).tobytes())
+        else:
+            store._interval.frombytes(interval.astype(np.int64).tobytes())
+        store._support.frombytes(
+            frame['support'].to_numpy(dtype=np.int64).tobytes())
+        return store
+
+    def to_arrow(self) -> Any:
+        """Return the nodes as a `pyarrow.Table` like `to_frame`, where
+        items are dictionary-encoded."""
+        import pyarrow
+        return pyarrow.Table.from_pandas(self.to_frame(), preserve_index=False)
+
+    @classmethod
+    def from_arrow(cls, table: Any) -> 'PatternStore':
+        """Read nodes returned by `to_arrow`."""
+        return cls.from_frame(table.to_pandas())
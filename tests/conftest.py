@@ -0,0 +1,25 @@
+from math import log2
+
+
+SEQUENCES = [
+    [(0, ['a', ]), (2, ['a', 'c', ]), (7, ['a', 'b', ]), (20, ['c', 'f', ])],
+    [(0, ['a', 'd', ]), (14, ['c', ]), (26, ['c', ])],
+    [(0, ['a', 'e', 'f', ]), (6, ['a', 'b', 'd', ]), (19, ['b', 'c', ])],
+]
+
+# more sequences, one of them empty, for sampling and sliding windows
+MORE_SEQUENCES = [
+    [(0, ['a', ]), (2, ['a', 'c', ]), (7, ['a', 'b', ]), (20, ['c', 'f', ])],
+    [(0, ['a', 'd', ]), (14, ['c', ])],
+    [(0, ['a', 'e', 'f', ]), (6, ['a', 'b', 'd', ]), (19, ['b', 'c', ])],
+    [(0, ['b', ]), (5, ['c', 'd', ])],
+    [(0, ['a', 'd', ]), (14, ['c', ]), (26, ['c', ])],
+    [(0, ['e', ]), (3, ['a', 'b', ]), (19, ['b', 'c', 'd', ])],
+    [],
+    [(0, ['a', 'f', ]), (9, ['b', ]), (15, ['c', 'f', ])],
+]
+
+
+def itemize(interval: int) -> int:
+    # a module-level function, which worker processes can unpickle
+    return int(log2(interval + 1))
@@ -0,0 +1,55 @@
+from math import inf
+
+import pytest
+
+from gisp.cache import PdbCache
+from gisp.gisp import Gisp
+from gisp.stats import Stats
+
+from .conftest import SEQUENCES, itemize
+
+
+class TestPdbCache:
+
+    def test_lru(self) -> None:
+        cache = PdbCache(max_bytes=100)
+        cache.put('a', 1, 40)
+        cache.put('b', 2, 40)
+        assert cache.get('a') == 1  # b is now the least recently used
+        cache.put('c', 3, 40)
+        assert cache.get('b') is None
+        assert cache.get('c') == 3
+        cache.put('d', 4, 200)  # larger than the whole budget
+        assert cache.get('d') is None
+        assert cache.summary() == {
+            'entries': 2, 'nbytes': 80, 'max_bytes': 100, 'hits': 2,
+            'misses': 2, 'evictions': 1, 'hit_rate': 0.5}
+
+    def test_mine(self) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        for pseudo_projection in [False, True]:
+            cache = PdbCache()
+            for min_support, max_interval, options in [
+                    (2, inf, {}), (3, inf, {}), (2, inf, {'closed': True}),
+                    (2, 10, {}), (2, inf, {'top_k': 3})]:
+                def gisp(cache):
+                    return Gisp(
+                        itemize, min_support, min_interval=0,
+                        max_interval=max_interval, min_whole_interval=0,
+                        max_whole_interval=inf,
+                        pseudo_projection=pseudo_projection, cache=cache,
+                        **options)
+                stats = Stats()
+                assert gisp(cache).mine(isdb, stats) == gisp(None).mine(isdb)
+                assert stats._live_bytes == 0
+            # the 20 PDBs of the first run are reused by every other run but
+            # the one of another max_interval, which counts 10 of its own
+            assert (cache.hits, cache.misses, len(cache)) == (27, 30, 30)
+
+            # entries are dropped when mining another ISDB
+            gisp(cache).mine(Gisp.transform(SEQUENCES, encode=True))
+            assert cache.hits == 27
+
+    def test_parallel(self) -> None:
+        with pytest.raises(ValueError):
+            Gisp(itemize, 2, 0, inf, 0, inf, n_jobs=2, cache=PdbCache())
@@ -0,0 +1,102 @@
+import argparse
+import json
+from math import inf, log2
+
+import pytest
+
+from gisp.cli import main, parse_itemizer, positive, read_csv, support
+from gisp.gisp import Gisp, Pattern
+from gisp.itemize import Breakpoints, FixedWidth, Log2
+
+from .conftest import SEQUENCES
+
+
+def read_patterns(path):
+    with open(path) as file:
+        return [Pattern(
+                    [tuple(element) for element in pattern['sequence']],
+                    pattern['support'])
+                for pattern in map(json.loads, file)]
+
+
+class TestCli:
+
+    def test_parse_itemizer(self) -> None:
+        assert parse_itemizer('fixed:86400')(172800) == 2
+        assert parse_itemizer('log2')(7) == Log2()(7)
+        assert parse_itemizer('log2:60').width == 60
+        assert isinstance(parse_itemizer('breakpoints:60,3600'), Breakpoints)
+        assert isinstance(parse_itemizer('fixed:0.5'), FixedWidth)
+        with pytest.raises(ValueError):
+            parse_itemizer('days')
+
+    def test_support(self) -> None:
+        assert support('3') == 3 and isinstance(support('2.0'), int)
+        assert support('0.25') == 0.25
+        for text in ['2.5', '0', '-1', 'nan']:
+            with pytest.raises(argparse.ArgumentTypeError):
+                support(text)
+        with pytest.raises(SystemExit):
+            main(['a.jsonl', '--min-support', '2.5'])
+
+    def test_positive(self) -> None:
+        assert positive('4') == 4
+        for text in ['0', '-2', '1.5', 'all']:
+            with pytest.raises(argparse.ArgumentTypeError):
+                positive(text)
+        for option in ['--jobs', '--top-k', '--max-length']:
+            with pytest.raises(SystemExit):
+                main(['a.jsonl', '--min-support', '2', option, '0'])
+
+    def test_read_csv(self, tmp_path, monkeypatch) -> None:
+        with open(tmp_path / 'a.csv', 'w') as file:
+            file.write('sid,item,interval\n')
+            for sid, sequence in enumerate(SEQUENCES):
+                for interval, items in sequence:
+                    for item in items:
+                        file.write(f'{sid},{item},{interval}\n')
+        # rows are added to the ISDB a few at a time
+        monkeypatch.setattr('gisp.cli.CSV_CHUNK_ROWS', 4)
+        isdb = read_csv(str(tmp_path / 'a.csv'))
+        expected = Gisp.transform(SEQUENCES, encode=True)
+        assert isdb.sid.tolist() == expected.sid.tolist()
+        assert isdb.item.tolist() == expected.item.tolist()
+        assert isdb.interval.tolist() == expected.interval.tolist()
+        assert list(isdb.items) == list(expected.items)
+
+    def test_main(self, tmp_path, capsys) -> None:
+        with open(tmp_path / 'a.jsonl', 'w') as file:
+            for sequence in SEQUENCES:
+                file.write(json.dumps(sequence) + '\n')
+            # not counted by a fractional --min-support
+            file.write('\n[]\n')
+        with open(tmp_path / 'b.csv', 'w') as file:
+            file.write('sid,item,interval\n')
+            for sid, sequence in enumerate(SEQUENCES):
+                for interval, items in sequence:
+                    for item in items:
+                        file.write(f'{sid},{item},{interval}\n')
+        (tmp_path / 'c.jsonl').write_text('not a sequence\n')
+
+        gisp = Gisp(
+            itemize=lambda t: int(log2(t+1)), min_support=2, min_interval=0,
+            max_interval=13, min_whole_interval=0, max_whole_interval=inf)
+        expected = gisp.mine(Gisp.transform(SEQUENCES, encode=True))
+        for jobs in ['1', '2']:
+            output = tmp_path / f'out{jobs}'
+            assert main([
+                str(tmp_path / 'a.jsonl'), str(tmp_path / 'b.csv'),
+                '--min-support', '0.6', '--max-interval', '13',
+                '--output-dir', str(output), '--jobs', jobs]) == 0
+            assert read_patterns(output / 'a.patterns.jsonl') == expected
+            assert read_patterns(output / 'b.patterns.jsonl') == expected
+            assert f'a.patterns.jsonl\t{len(expected)}' \
+                in capsys.readouterr().out
+
+        # files failing are reported while others are mined
+        assert main([
+            str(tmp_path / 'a.jsonl'), str(tmp_path / 'c.jsonl'),
+            '--min-support', '2', '--output-dir', str(tmp_path / 'out'),
+            '--jobs', '1']) == 1
+        assert 'JSONDecodeError' in capsys.readouterr().err
+        assert (tmp_path / 'out' / 'a.patterns.jsonl').exists()
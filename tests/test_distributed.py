@@ -0,0 +1,53 @@
+from math import inf
+
+import pytest
+
+from gisp.distributed import LocalTransport, iter_patterns, partition
+from gisp.gisp import Gisp
+
+from .conftest import SEQUENCES, itemize
+
+
+class TestDistributed:
+
+    def test_partition(self) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        parts = partition(isdb, 2)
+        assert [part.sid.tolist() for part in parts] == [
+            [0, 0, 0, 0, 0, 0, 0, 2, 2, 2, 2, 2, 2, 2, 2],
+            [1, 1, 1, 1],
+        ]
+        assert all(part.items is isdb.items for part in parts)
+
+    def test_mine(self, tmp_path) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        with LocalTransport(2) as transport:
+            for options in [
+                    {}, {'pseudo_projection': True}, {'max_interval': 13},
+                    {'min_whole_interval': 7}, {'max_length': 2},
+                    {'top_k': 3}]:
+                settings = dict(
+                    itemize=itemize, min_support=2, min_interval=0,
+                    max_interval=inf, min_whole_interval=0,
+                    max_whole_interval=inf)
+                settings.update(options)
+                patterns = Gisp(**settings).mine(isdb)
+                assert Gisp(**settings, transport=transport).mine(
+                    isdb) == patterns
+
+            # partitions may be files loaded by workers, with item
+            # dictionaries of their own
+            paths = [str(tmp_path / f'{k}.isdb') for k in range(2)]
+            Gisp.transform(SEQUENCES[:2], encode=True).save(paths[0])
+            Gisp.transform(SEQUENCES[2:], encode=True).save(paths[1])
+            gisp = Gisp(itemize, 2, 0, inf, 0, inf)
+            assert list(iter_patterns(gisp, paths, transport)) == gisp.mine(
+                isdb)
+
+            # errors of workers are raised by the driver
+            with pytest.raises(FileNotFoundError):
+                list(iter_patterns(gisp, ['missing', paths[1]], transport))
+            with pytest.raises(ValueError):
+                list(iter_patterns(
+                    Gisp(itemize, 2, 0, inf, 0, inf, closed=True), isdb,
+                    transport))
@@ -0,0 +1,359 @@
+import tracemalloc
+from math import inf, log2
+
+import numpy as np
+
+from gisp.engine import (
+    Engine, batches, count_distinct, ranges, search, select_top)
+from gisp.gisp import Gisp, Pattern
+from gisp.isdb import Isdb
+from gisp.stats import Stats
+
+from .conftest import MORE_SEQUENCES, SEQUENCES
+
+
+class TestEngine:
+
+    def test_ranges(self) -> None:
+        values, owner = ranges(np.array([3, 7, 0]), np.array([5, 7, 2]))
+        assert values.tolist() == [3, 4, 0, 1]
+        assert owner.tolist() == [0, 0, 2, 2]
+
+    def test_search(self) -> None:
+        values = np.array([1, 3, 3, 8, 2, 4, 0])
+        starts, stops = np.array([0, 4, 6, 6]), np.array([4, 6, 6, 7])
+        targets = np.array([3, 9, 5, 0])
+        assert search(values, starts, stops, targets).tolist() == [1, 6, 6, 6]
+        assert search(
+            values, starts, stops, targets, 'right').tolist() == [3, 6, 6, 7]
+        # values at positions given by rows
+        rows = np.array([6, 0, 1, 2, 3])
+        assert search(
+            values, np.array([1]), np.array([5]), np.array([3]), 'right',
+            rows).tolist() == [4]
+
+    def test_window(self) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        gisp = Gisp(
+            itemize=lambda t: int(log2(t+1)), min_support=2, min_interval=2,
+            max_interval=7, min_whole_interval=0, max_whole_interval=19)
+        # postfixes of a at 0 in sequence 0 and of e at 0 in sequence 2
+        lo, hi, stops = Engine(gisp, isdb).window(
+            np.array([1, 13]), np.array([7, 19]), np.array([0, 0]),
+            np.array([0, 11]))
+        assert lo.tolist() == [1, 14]  # a at 2, and a at 6
+        assert hi.tolist() == [5, 17]  # up to b at 7, and d at 6
+        assert stops.tolist() == [5, 19]  # up to b at 7, and c at 19
+
+    def test_count_distinct(self) -> None:
+        # dense and ordered groups are deduplicated in a dense matrix
+        keys, counts = count_distinct(
+            np.array([0, 0, 0, 1, 1, 3]), np.array([5, 2, 5, 5, 7, 2]))
+        assert keys.tolist() == [2, 5, 7]
+        assert counts.tolist() == [2, 2, 1]
+        # unordered groups are counted by sorted pairs
+        keys, counts = count_distinct(
+            np.array([3, 0, 1, 0, 1, 0]), np.array([2, 5, 5, 2, 7, 5]))
+        assert keys.tolist() == [2, 5, 7]
+        assert counts.tolist() == [2, 2, 1]
+        keys, counts = count_distinct(
+            np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        assert keys.tolist() == counts.tolist() == []
+        # sparse keys are compacted without a table over their range
+        keys, counts = count_distinct(
+            np.array([0, 0, 1, 2]), np.array([10**12, 7, 10**12, 7]))
+        assert keys.tolist() == [7, 10**12]
+        assert counts.tolist() == [2, 2]
+
+    def test_mine_large_dictionary(self) -> None:
+        # frequent items sorting after many rare ones have large codes, and
+        # many distinct intervals make extension keys larger still
+        rng = np.random.default_rng(0)
+        n_rare = 100000
+        isdb = Isdb.from_rows(
+            np.concatenate((np.repeat(np.arange(2000), 2),
+                            np.arange(n_rare) % 2000)),
+            ['zz1', 'zz2'] * 2000 + [f'r{k:06d}' for k in range(n_rare)],
+            np.concatenate((
+                np.repeat(rng.integers(0, 5000, 2000), 2)
+                + np.tile([0, 1], 2000) * rng.integers(1, 3000, 4000),
+                np.full(n_rare, 5))))
+        for closed in [False, True]:
+            gisp = Gisp(
+                itemize=lambda t: t, min_support=1000, min_interval=0,
+                max_interval=inf, min_whole_interval=0,
+                max_whole_interval=inf, max_length=2, closed=closed)
+            tracemalloc.start()
+            try:
+                patterns = gisp.mine(isdb)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            assert [pattern.sequence for pattern in patterns] == [
+                [(0, 'zz1')], [(0, 'zz2')]]
+            assert peak < 64 * 2**20
+
+    def test_truncate(self) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        gisp = Gisp(
+            itemize=lambda t: int(log2(t+1)), min_support=2, min_interval=0,
+            max_interval=inf, min_whole_interval=0, max_whole_interval=13)
+        engine = Engine(gisp, isdb)
+        # postfixes of a at 0 in sequence 0 and at 6 in sequence 2
+        pdb = engine.project(
+            np.array([1, 15]), np.array([7, 19]), np.array([0, 6]),
+            np.array([0, 0]))
+        pdb = engine.truncate(pdb)
+        assert pdb.row.tolist() == [1, 2, 3, 4, 15, 16]
+        assert pdb.end.tolist() == [4, 4, 4, 4, 6, 6]
+
+    def test_mine(self) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        gisp = Gisp(
+            itemize=lambda t: int(log2(t+1)), min_support=2, min_interval=0,
+            max_interval=inf, min_whole_interval=0, max_whole_interval=inf)
+        patterns = gisp.mine(isdb)
+        assert sorted(patterns) == sorted([
+            Pattern([(0, 'a')], 3),
+            Pattern([(0, 'b')], 2),
+            Pattern([(0, 'c')], 3),
+            Pattern([(0, 'd')], 2),
+            Pattern([(0, 'f')], 2),
+            Pattern([(0, 'a'), (0, 'b')], 2),
+            Pattern([(0, 'a'), (0, 'd')], 2),
+            Pattern([(0, 'a'), (2, 'a')], 2),
+            Pattern([(0, 'a'), (2, 'b')], 2),
+            Pattern([(0, 'a'), (3, 'b')], 2),
+            Pattern([(0, 'a'), (3, 'c')], 3),
+            Pattern([(0, 'a'), (4, 'c')], 3),
+            Pattern([(0, 'a'), (0, 'b'), (3, 'c')], 2),
+            Pattern([(0, 'a'), (2, 'a'), (0, 'b')], 2),
+            Pattern([(0, 'a'), (2, 'a'), (3, 'c')], 2),
+            Pattern([(0, 'a'), (2, 'a'), (0, 'b'), (3, 'c')], 2),
+            Pattern([(0, 'a'), (2, 'b'), (3, 'c')], 2),
+            Pattern([(0, 'a'), (0, 'd'), (3, 'c')], 2),
+            Pattern([(0, 'b'), (3, 'c')], 2),
+            Pattern([(0, 'd'), (3, 'c')], 2),
+        ])
+
+    def test_mine_same_as_dataframe(self) -> None:
+        for constraints in [
+            dict(min_interval=6, max_interval=inf,
+                 min_whole_interval=0, max_whole_interval=inf),
+            dict(min_interval=0, max_interval=13,
+                 min_whole_interval=0, max_whole_interval=inf),
+            dict(min_interval=0, max_interval=inf,
+                 min_whole_interval=6, max_whole_interval=inf),
+            dict(min_interval=0, max_interval=inf,
+                 min_whole_interval=0, max_whole_interval=13),
+            dict(min_interval=2, max_interval=13,
+                 min_whole_interval=6, max_whole_interval=20),
+        ]:
+            gisp = Gisp(
+                itemize=lambda t: int(log2(t+1)), min_support=2,
+                **constraints)
+            assert sorted(gisp.mine(Gisp.transform(SEQUENCES, encode=True))) \
+                == sorted(gisp.mine(Gisp.transform(SEQUENCES)))
+
+    def test_mine_with_pseudo_projection(self) -> None:
+        isdb = Gisp.transform(SEQUENCES)
+        for max_interval in [inf, 13]:
+            gisp = Gisp(
+                itemize=lambda t: int(log2(t+1)), min_support=2,
+                min_interval=0, max_interval=max_interval,
+                min_whole_interval=0, max_whole_interval=inf)
+            pseudo_gisp = Gisp(
+                itemize=lambda t: int(log2(t+1)), min_support=2,
+                min_interval=0, max_interval=max_interval,
+                min_whole_interval=0, max_whole_interval=inf,
+                pseudo_projection=True)
+            assert pseudo_gisp.mine(isdb) \
+                == gisp.mine(Gisp.transform(SEQUENCES, encode=True))
+            assert sorted(pseudo_gisp.mine(isdb)) == sorted(gisp.mine(isdb))
+
+    def test_batches(self) -> None:
+        seq = np.array([0, 0, 1, 2, 2, 3])
+        lengths = np.array([2, 1, 4, 1, 1, 2])
+        assert batches(seq, lengths, 11) == [0, 6]
+        assert batches(seq, lengths, 4) == [0, 2, 3, 6]
+        # sequences are never split, even if one takes more than rows
+        assert batches(seq, lengths, 2) == [0, 2, 3, 5, 6]
+        assert batches(seq[:0], lengths[:0], 2) == [0]
+
+    def test_mine_with_pseudo_projection_in_batches(self, monkeypatch) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        for constraints in [
+            dict(min_interval=0, max_interval=inf,
+                 min_whole_interval=0, max_whole_interval=inf),
+            dict(min_interval=2, max_interval=13,
+                 min_whole_interval=6, max_whole_interval=20),
+        ]:
+            gisp = Gisp(
+                itemize=lambda t: int(log2(t+1)), min_support=2,
+                **constraints)
+            patterns = gisp.mine(isdb)
+            monkeypatch.setattr('gisp.engine.BATCH_ROWS', 2)
+            assert Gisp(
+                itemize=lambda t: int(log2(t+1)), min_support=2,
+                pseudo_projection=True, **constraints).mine(isdb) == patterns
+            monkeypatch.undo()
+
+    def test_pseudo_projection_memory(self) -> None:
+        # long postfixes of frequent items, whose records take less memory
+        # than their items, which are only expanded a batch at a time
+        rng = np.random.default_rng(0)
+        isdb = Gisp.transform([
+            [(t, [f'i{k}' for k in rng.choice(8, 2)])
+             for t in range(0, 800, 10)]
+            for _ in range(50)], encode=True)
+        peaks = []
+        for pseudo_projection in [False, True]:
+            gisp = Gisp(
+                itemize=lambda t: int(log2(t+1)), min_support=50,
+                min_interval=0, max_interval=inf, min_whole_interval=0,
+                max_whole_interval=inf, max_length=2,
+                pseudo_projection=pseudo_projection)
+            stats = Stats()
+            tracemalloc.start()
+            try:
+                patterns = gisp.mine(isdb, stats)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            peaks.append((stats.peak_bytes, peak, sorted(patterns)))
+        (stats_peak, peak, patterns), (pseudo_stats_peak, pseudo_peak,
+                                       pseudo_patterns) = peaks
+        assert pseudo_patterns == patterns
+        assert pseudo_stats_peak < stats_peak / 2
+        assert pseudo_peak < 0.8 * peak
+
+    def test_mine_memory_mapped(self, tmp_path) -> None:
+        isdb = Gisp.transform(SEQUENCES + [[(0, ['g', ])]], encode=True)
+        isdb.save(tmp_path / 'isdb.bin')
+        gisp = Gisp(
+            itemize=lambda t: int(log2(t+1)), min_support=2, min_interval=0,
+            max_interval=13, min_whole_interval=0, max_whole_interval=inf)
+        assert gisp.mine(Isdb.load(tmp_path / 'isdb.bin')) == gisp.mine(isdb)
+
+    def test_mine_with_max_length(self) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        patterns = Gisp(
+            itemize=lambda t: int(log2(t+1)), min_support=2, min_interval=0,
+            max_interval=inf, min_whole_interval=0, max_whole_interval=inf,
+        ).mine(isdb)
+        for max_length in [1, 2, 3]:
+            gisp = Gisp(
+                itemize=lambda t: int(log2(t+1)), min_support=2,
+                min_interval=0, max_interval=inf, min_whole_interval=0,
+                max_whole_interval=inf, max_length=max_length)
+            assert gisp.mine(isdb) == [
+                p for p in patterns if len(p.sequence) <= max_length]
+
+    def test_mine_top_k(self) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        gisp = Gisp(
+            itemize=lambda t: int(log2(t+1)), min_support=2, min_interval=0,
+            max_interval=inf, min_whole_interval=0, max_whole_interval=inf,
+            top_k=4)
+        assert gisp.mine(isdb) == [
+            Pattern([(0, 'a')], 3),
+            Pattern([(0, 'a'), (3, 'c')], 3),
+            Pattern([(0, 'a'), (4, 'c')], 3),
+            Pattern([(0, 'c')], 3),
+        ]
+
+        gisp = Gisp(
+            itemize=lambda t: int(log2(t+1)), min_support=2, min_interval=0,
+            max_interval=inf, min_whole_interval=0, max_whole_interval=inf,
+            top_k=6)
+        patterns = gisp.mine(isdb)
+        assert [p.support for p in patterns] == [3, 3, 3, 3, 2, 2]
+        assert patterns[4:] == [
+            Pattern([(0, 'a'), (2, 'a')], 2),
+            Pattern([(0, 'a'), (2, 'a'), (0, 'b')], 2),
+        ]
+
+    def test_mine_top_k_condensed(self) -> None:
+        # the top patterns of MORE_SEQUENCES have less frequent extensions
+        for sequences in [SEQUENCES, MORE_SEQUENCES]:
+            isdb = Gisp.transform(sequences, encode=True)
+            for settings in [dict(closed=True), dict(maximal=True)]:
+                gisp = Gisp(
+                    itemize=lambda t: int(log2(t+1)), min_support=2,
+                    min_interval=0, max_interval=inf, min_whole_interval=0,
+                    max_whole_interval=inf, **settings)
+                patterns = gisp.mine(isdb)
+                for top_k in range(1, len(patterns) + 2):
+                    assert gisp.replace(top_k=top_k).mine(isdb) \
+                        == select_top(patterns, top_k)
+
+    def test_mine_closed(self) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        gisp = Gisp(
+            itemize=lambda t: int(log2(t+1)), min_support=2, min_interval=0,
+            max_interval=inf, min_whole_interval=0, max_whole_interval=inf,
+            closed=True)
+        assert sorted(gisp.mine(isdb)) == sorted([
+            Pattern([(0, 'f')], 2),
+            Pattern([(0, 'a'), (3, 'b')], 2),
+            Pattern([(0, 'a'), (3, 'c')], 3),
+            Pattern([(0, 'a'), (4, 'c')], 3),
+            Pattern([(0, 'a'), (2, 'a'), (3, 'c')], 2),
+            Pattern([(0, 'a'), (2, 'a'), (0, 'b'), (3, 'c')], 2),
+            Pattern([(0, 'a'), (2, 'b'), (3, 'c')], 2),
+            Pattern([(0, 'a'), (0, 'd'), (3, 'c')], 2),
+        ])
+
+    def test_mine_maximal(self) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        for pseudo_projection in [False, True]:
+            gisp = Gisp(
+                itemize=lambda t: int(log2(t+1)), min_support=2,
+                min_interval=0, max_interval=inf, min_whole_interval=0,
+                max_whole_interval=inf, pseudo_projection=pseudo_projection,
+                maximal=True)
+            # a -(3)-> c is prepended by a -(2)-> in two sequences
+            assert sorted(gisp.mine(isdb)) == sorted([
+                Pattern([(0, 'f')], 2),
+                Pattern([(0, 'a'), (3, 'b')], 2),
+                Pattern([(0, 'a'), (4, 'c')], 3),
+                Pattern([(0, 'a'), (2, 'a'), (3, 'c')], 2),
+                Pattern([(0, 'a'), (2, 'a'), (0, 'b'), (3, 'c')], 2),
+                Pattern([(0, 'a'), (2, 'b'), (3, 'c')], 2),
+                Pattern([(0, 'a'), (0, 'd'), (3, 'c')], 2),
+            ])
+
+    def test_mine_maximal_top_k(self) -> None:
+        # b is the most frequent, but b, c is frequent too, so b is not
+        # maximal even once top_k raises the threshold above its support
+        sequences = [
+            [(0, ['b', 'c', 'd'])],
+            [(3, ['a', 'b', 'c']), (6, ['d'])],
+            [(0, ['a']), (6, ['a', 'c'])],
+            [(3, ['c'])],
+            [(0, ['b']), (6, ['a'])],
+        ]
+        isdb = Gisp.transform(sequences, encode=True)
+        gisp = Gisp(
+            itemize=lambda t: t // 3, min_support=2, min_interval=0,
+            max_interval=inf, min_whole_interval=0, max_whole_interval=9,
+            maximal=True)
+        patterns = gisp.mine(isdb)
+        assert Pattern([(0, 'b')], 3) not in patterns
+        for top_k in range(1, len(patterns) + 1):
+            assert gisp.replace(top_k=top_k).mine(isdb) == select_top(
+                patterns, top_k)
+
+    def test_mine_closed_pruned_backward(self) -> None:
+        # b always comes with a, so nothing headed by b is closed
+        sequences = [[(0, ['a', 'b']), (5, ['c'])], [(0, ['a', 'b'])]]
+        isdb = Gisp.transform(sequences, encode=True)
+        gisp = Gisp(
+            itemize=lambda t: int(log2(t+1)), min_support=1, min_interval=0,
+            max_interval=inf, min_whole_interval=0, max_whole_interval=inf,
+            closed=True)
+        assert sorted(gisp.mine(isdb)) == sorted([
+            Pattern([(0, 'a'), (0, 'b')], 2),
+            Pattern([(0, 'a'), (2, 'c')], 1),
+            Pattern([(0, 'a'), (0, 'b'), (2, 'c')], 1),
+        ])
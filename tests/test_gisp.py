@@ -1,8 +1,13 @@
+import os
+import subprocess
+import sys
 from math import inf, log2
 
 from pandas import DataFrame
 from pandas.testing import assert_frame_equal
+import pytest
 
+import gisp
 from gisp.gisp import Gisp, Pattern
 
 
@@ -371,4 +376,63 @@ class TestGisp:
             Pattern([(0, 'a'), (0, 'b'), (3, 'c')], 2),
             Pattern([(0, 'a'), (2, 'a'), (0, 'b')], 2),
             Pattern([(0, 'b'), (3, 'c')], 2),
-        ])
\ No newline at end of file
+        ])
+
+    def test_mine_function(self) -> None:
+        sequences = [
+            [(0, ['a', ]), (86400, ['a', 'b', 'c', ]), (259200, ['a', 'c', ])],
+            [(0, ['a', 'd', ]), (259200, ['c', ])],
+            [(0, ['a', 'e', 'f', ]), (172800, ['a', 'b', ])],
+        ]
+        patterns = gisp.mine(
+            sequences, itemize=lambda i: i // 86400, min_support=2,
+            max_interval=172800)
+        assert patterns == [
+            Pattern([(0, 'a')], 3),
+            Pattern([(0, 'a'), (2, 'a')], 2),
+            Pattern([(0, 'a'), (0, 'b')], 2),
+            Pattern([(0, 'b')], 2),
+            Pattern([(0, 'c')], 2),
+        ]
+
+    def test_iter_patterns(self) -> None:
+        sequences = [
+            [(0, ['a', ]), (2, ['a', 'c', ]), (7, ['a', 'b', ])],
+            [(0, ['a', 'd', ]), (14, ['c', ]), (26, ['c', ])],
+            [(0, ['a', 'e', 'f', ]), (6, ['a', 'b', 'd', ])],
+        ]
+        patterns = gisp.iter_patterns(
+            iter(sequences), itemize=lambda t: int(log2(t+1)),
+            min_support=2)
+        assert next(patterns) == Pattern([(0, 'a')], 3)
+        assert [Pattern([(0, 'a')], 3)] + list(patterns) == gisp.mine(
+            sequences, itemize=lambda t: int(log2(t+1)), min_support=2)
+
+    def test_mine_without_pandas(self) -> None:
+        # pandas is only imported for DataFrames
+        script = (
+            "import sys, gisp; "
+            "gisp.mine([[(0, ['a']), (1, ['b'])]] * 2, "
+            "gisp.FixedWidth(1), 2); "
+            "assert 'pandas' not in sys.modules")
+        subprocess.run(
+            [sys.executable, '-c', script], check=True,
+            cwd=os.path.dirname(os.path.dirname(gisp.__file__)))
+
+    def test_replace(self) -> None:
+        itemize = gisp.FixedWidth(1)
+        original = Gisp(
+            itemize, 2, min_interval=0, max_interval=5, min_whole_interval=0,
+            max_whole_interval=inf, max_length=3, cache=gisp.PdbCache())
+        replaced = original.replace(min_support=3, cache=None)
+        assert replaced._min_support == 3 and replaced._cache is None
+        assert replaced._itemize_key is itemize
+        assert replaced._max_interval == 5 and replaced._max_length == 3
+        assert original._min_support == 2 and original._cache is not None
+
+    def test_invalid_settings(self) -> None:
+        for settings in [dict(top_k=0), dict(max_length=0)]:
+            with pytest.raises(ValueError):
+                Gisp(
+                    gisp.FixedWidth(1), 2, min_interval=0, max_interval=inf,
+                    min_whole_interval=0, max_whole_interval=inf, **settings)
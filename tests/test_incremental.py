@@ -0,0 +1,94 @@
+from math import inf, log2
+
+import pytest
+
+from gisp.gisp import Gisp
+from gisp.incremental import IncrementalMiner, SlidingWindowMiner
+from gisp.isdb import Isdb
+
+from .conftest import MORE_SEQUENCES as SEQUENCES
+
+
+# (sid, item, timestamp) of the sequences spread over time
+EVENTS = sorted(
+    (timestamp + 4 * sid, sid, item)
+    for sid, sequence in enumerate(SEQUENCES)
+    for timestamp, items in sequence for item in items)
+
+
+def columns(start, stop):
+    """Return sids, items and timestamps of events in (start, stop]."""
+    events = [event for event in EVENTS if start < event[0] <= stop]
+    return (
+        [sid for _, sid, _ in events], [item for _, _, item in events],
+        [timestamp for timestamp, _, _ in events])
+
+
+class TestIncrementalMiner:
+
+    def test_add(self) -> None:
+        for constraints in [
+            dict(min_interval=0, max_interval=inf,
+                 min_whole_interval=0, max_whole_interval=inf),
+            dict(min_interval=2, max_interval=13,
+                 min_whole_interval=0, max_whole_interval=inf),
+            dict(min_interval=0, max_interval=inf,
+                 min_whole_interval=6, max_whole_interval=20),
+        ]:
+            gisp = Gisp(
+                itemize=lambda t: int(log2(t+1)), min_support=3,
+                **constraints)
+            for buffer_support in [1, 2, 3]:
+                miner = IncrementalMiner(gisp, buffer_support)
+                for start, stop in [(0, 2), (2, 3), (3, 5), (5, 8)]:
+                    miner.add(SEQUENCES[start:stop])
+                    assert miner.patterns() == gisp.mine(
+                        Gisp.transform(SEQUENCES[:stop], encode=True))
+
+    def test_max_length(self) -> None:
+        gisp = Gisp(
+            itemize=lambda t: int(log2(t+1)), min_support=2, min_interval=0,
+            max_interval=inf, min_whole_interval=0, max_whole_interval=inf,
+            max_length=2)
+        miner = IncrementalMiner(gisp)
+        miner.add(SEQUENCES[:4])
+        miner.add(SEQUENCES[4:])
+        assert miner.patterns() == gisp.mine(
+            Gisp.transform(SEQUENCES, encode=True))
+
+    def test_unsupported(self) -> None:
+        gisp = Gisp(
+            itemize=lambda t: int(log2(t+1)), min_support=2, min_interval=0,
+            max_interval=inf, min_whole_interval=0, max_whole_interval=inf,
+            closed=True)
+        with pytest.raises(ValueError):
+            IncrementalMiner(gisp)
+
+
+class TestSlidingWindowMiner:
+
+    def test_push(self) -> None:
+        for constraints in [
+            dict(min_interval=0, max_interval=inf,
+                 min_whole_interval=0, max_whole_interval=inf),
+            dict(min_interval=2, max_interval=13,
+                 min_whole_interval=0, max_whole_interval=inf),
+            dict(min_interval=0, max_interval=inf,
+                 min_whole_interval=0, max_whole_interval=12),
+        ]:
+            gisp = Gisp(
+                itemize=lambda t: int(log2(t+1)), min_support=2,
+                **constraints)
+            for window in [15, 30]:
+                miner = SlidingWindowMiner(gisp, window)
+                for now in range(5, 60, 5):
+                    miner.push(*columns(now - 5, now), now=now)
+                    assert miner.patterns() == gisp.mine(
+                        Isdb.from_rows(*columns(now - window, now)))
+
+    def test_add(self) -> None:
+        gisp = Gisp(
+            itemize=lambda t: int(log2(t+1)), min_support=2, min_interval=0,
+            max_interval=inf, min_whole_interval=0, max_whole_interval=inf)
+        with pytest.raises(TypeError):
+            SlidingWindowMiner(gisp, 10).add(SEQUENCES)
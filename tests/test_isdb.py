@@ -0,0 +1,106 @@
+import numpy as np
+from pandas.testing import assert_frame_equal
+
+from gisp.gisp import Gisp
+from gisp.isdb import Isdb, IsdbBuilder, is_ordered
+
+
+class TestIsdb:
+
+    def test_from_sequences(self) -> None:
+        sequences = [
+            [(0, ['a', ]), (86400, ['c', 'b', 'a', ]), (259200, ['a', 'c', ])],
+            [(0, ['a', 'd', ]), (259200, ['c', ])],
+            [(0, ['f', 'e', 'a', ]), (172800, ['a', 'b', ])],
+        ]
+        isdb = Isdb.from_sequences(sequences)
+        assert list(isdb.items) == ['a', 'b', 'c', 'd', 'e', 'f']
+        assert isdb.offsets.tolist() == [0, 6, 9, 14]
+        assert isdb.item.tolist() == [0, 0, 1, 2, 0, 2, 0, 3, 2, 0, 4, 5, 0, 1]
+        assert isdb.n_sequences == 3
+        assert_frame_equal(
+            isdb.to_frame(), Gisp.transform(sequences), check_dtype=False)
+
+    def test_from_frame(self) -> None:
+        sequences = [
+            [(0, ['a', ]), (2, ['a', 'c', ]), (7, ['a', 'b', ])],
+            [(0, ['a', 'd', ]), (14, ['c', ]), (26, ['c', ])],
+        ]
+        frame = Gisp.transform(sequences)
+        isdb = Isdb.from_frame(frame)
+        assert isdb.seq.tolist() == [0, 0, 0, 0, 0, 1, 1, 1, 1]
+        assert isdb.ends.tolist() == [5, 5, 5, 5, 5, 9, 9, 9, 9]
+        assert_frame_equal(isdb.to_frame(), frame, check_dtype=False)
+
+    def test_builder(self) -> None:
+        builder = IsdbBuilder()
+        builder.add_sequence([(0, ['c', 'a', ]), (7, ['b', ])])
+        builder.add_rows(
+            sid=[1, 1, 1, 2], item=['d', 'a', 'c', 'a'],
+            interval=[0, 0, 14, 0])
+        builder.add_sequence([(6, ['b', 'd', ]), (0, ['a', ])], sid=3)
+        isdb = builder.build()
+        assert list(isdb.items) == ['a', 'b', 'c', 'd']
+        assert isdb.sid.tolist() == [0, 0, 0, 1, 1, 1, 2, 3, 3, 3]
+        assert isdb.item.tolist() == [0, 2, 1, 0, 3, 2, 0, 0, 1, 3]
+        assert isdb.interval.tolist() == [0, 0, 7, 0, 0, 14, 0, 0, 6, 6]
+        assert len(builder.build()) == 0
+
+    def test_from_batches(self) -> None:
+        frame = Gisp.transform([
+            [(0, ['a', ]), (2, ['a', 'c', ]), (7, ['a', 'b', ])],
+            [(0, ['a', 'd', ]), (14, ['c', ]), (26, ['c', ])],
+        ])
+        isdb = Isdb.from_batches([frame[:4], frame[4:]])
+        assert_frame_equal(isdb.to_frame(), frame, check_dtype=False)
+
+    def test_is_ordered(self) -> None:
+        sid = np.array([0, 0, 0, 1])
+        assert is_ordered(sid, np.array([0, 1, 0, 0]), np.array([0, 0, 5, 0]))
+        assert not is_ordered(
+            sid, np.array([1, 0, 0, 0]), np.array([0, 0, 5, 0]))
+        assert not is_ordered(
+            sid, np.array([0, 1, 0, 0]), np.array([0, 5, 0, 0]))
+        assert not is_ordered(
+            sid[::-1], np.array([0, 1, 0, 0]), np.array([0, 0, 5, 0]))
+
+    def test_append(self) -> None:
+        isdb = Isdb.from_sequences([[(0, ['c', 'a', ]), (7, ['b', ])]])
+        builder = IsdbBuilder()
+        builder.add_sequence([(0, ['d', ]), (3, ['a', ])], sid=1)
+        isdb = isdb.append(builder.build())
+        assert list(isdb.items) == ['a', 'b', 'c', 'd']
+        assert isdb.sid.tolist() == [0, 0, 0, 1, 1]
+        assert isdb.item.tolist() == [0, 2, 1, 3, 0]
+        assert isdb.offsets.tolist() == [0, 3, 5]
+
+    def test_keep_items(self) -> None:
+        isdb = Isdb.from_sequences([
+            [(0, ['a', 'd', ]), (14, ['c', ]), (26, ['c', ])],
+            [(0, ['d', ])],
+            [(0, ['a', 'e', 'f', ]), (6, ['c', ])],
+        ])
+        assert isdb.keep_items([0, 1, 2, 3, 4]) is isdb
+        pruned = isdb.keep_items([0, 1])
+        assert pruned.item.tolist() == [0, 1, 1, 0, 1]
+        assert pruned.offsets.tolist() == [0, 3, 5]
+
+    def test_save_and_load(self, tmp_path) -> None:
+        isdb = Isdb.from_sequences([
+            [(0, ['a', ]), (2, ['a', 'c', ]), (7, ['a', 'b', ])],
+            [(0, ['a', 'd', ]), (14, ['c', ]), (26, ['c', ])],
+        ])
+        path = tmp_path / 'isdb.bin'
+        isdb.save(path)
+        for mmap in [True, False]:
+            loaded = Isdb.load(path, mmap=mmap)
+            assert loaded.mapped == mmap
+            assert list(loaded.items) == list(isdb.items)
+            for name in ['sid', 'item', 'interval', 'offsets', 'seq', 'ends']:
+                assert getattr(loaded, name).tolist() \
+                    == getattr(isdb, name).tolist()
+                assert getattr(loaded, name).dtype \
+                    == getattr(isdb, name).dtype
+
+        Isdb.from_sequences([]).save(path)
+        assert len(Isdb.load(path)) == 0
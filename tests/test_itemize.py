@@ -0,0 +1,51 @@
+from math import log2
+
+import numpy as np
+
+from gisp.itemize import Breakpoints, FixedWidth, Function, Log2, vectorize
+
+
+INTERVALS = np.array([0, 1, 2, 3, 6, 7, 13, 86399, 86400, 259200])
+
+
+class TestItemize:
+
+    def test_fixed_width(self) -> None:
+        itemize = FixedWidth(86400)
+        assert itemize(INTERVALS).tolist() == [0] * 8 + [1, 3]
+        assert itemize(172800) == 2
+
+    def test_log2(self) -> None:
+        itemize = Log2()
+        assert itemize(INTERVALS).tolist() == [
+            int(log2(i + 1)) for i in INTERVALS.tolist()]
+        assert itemize(7) == 3
+        assert Log2(2)(np.array([0, 2, 6])).tolist() == [0, 1, 2]
+
+    def test_breakpoints(self) -> None:
+        itemize = Breakpoints([2, 7, 86400])
+        assert itemize(INTERVALS).tolist() == [0, 0, 1, 1, 1, 2, 2, 2, 3, 3]
+        assert itemize(7) == 2
+
+    def test_function(self) -> None:
+        itemize = vectorize(lambda i: i // 86400)
+        assert isinstance(itemize, Function)
+        assert itemize(INTERVALS).tolist() == [0] * 8 + [1, 3]
+        assert itemize._vectorized
+
+        calls = []
+
+        def log2_itemize(interval: int) -> int:
+            calls.append(interval)
+            return int(log2(interval + 1))
+
+        itemize = vectorize(log2_itemize)
+        intervals = np.array([7, 0, 7, 3, 0])
+        assert itemize(intervals).tolist() == [3, 0, 3, 2, 0]
+        assert not itemize._vectorized
+        calls.clear()
+        assert itemize(intervals).tolist() == [3, 0, 3, 2, 0]
+        assert itemize(3) == 2
+        assert calls == []
+        log2_itemize = Log2()
+        assert vectorize(log2_itemize) is log2_itemize
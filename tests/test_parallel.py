@@ -0,0 +1,63 @@
+from math import inf
+
+from gisp.engine import select_top
+from gisp.gisp import Gisp
+from gisp.parallel import attach, mine, share
+from gisp.stats import Stats
+
+from .conftest import MORE_SEQUENCES, SEQUENCES, itemize
+
+
+class TestParallel:
+
+    def test_share(self) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        shm, shared = share(isdb)
+        try:
+            attached = attach(shared)
+            assert attached.sid.tolist() == isdb.sid.tolist()
+            assert attached.item.tolist() == isdb.item.tolist()
+            assert attached.interval.tolist() == isdb.interval.tolist()
+            assert list(attached.items) == list(isdb.items)
+        finally:
+            del attached
+            shm.close()
+            shm.unlink()
+
+    def test_mine(self) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        gisp = Gisp(
+            itemize=itemize, min_support=2, min_interval=0,
+            max_interval=inf, min_whole_interval=0, max_whole_interval=inf)
+        patterns = gisp.mine(isdb)
+        assert mine(gisp, isdb, n_jobs=2) == patterns
+        assert mine(gisp, isdb, n_jobs=2, split_level=2) == patterns
+
+        stats = Stats()
+        mine(gisp, isdb, n_jobs=2, stats=stats)
+        assert [level['projections'] for level in stats.summary()[
+            'levels']] == [0, 5, 9, 5, 1]
+
+        gisp = Gisp(
+            itemize=itemize, min_support=2, min_interval=0,
+            max_interval=inf, min_whole_interval=0, max_whole_interval=inf,
+            top_k=6)
+        assert mine(gisp, isdb, n_jobs=2, split_level=2) == gisp.mine(isdb)
+
+        more = Gisp.transform(MORE_SEQUENCES, encode=True)
+        gisp = Gisp(
+            itemize=itemize, min_support=2, min_interval=0,
+            max_interval=inf, min_whole_interval=0, max_whole_interval=inf,
+            maximal=True)
+        patterns = gisp.mine(more)
+        assert mine(gisp.replace(top_k=3), more, n_jobs=2) == select_top(
+            patterns, 3)
+
+        gisp = Gisp(
+            itemize=itemize, min_support=2, min_interval=0,
+            max_interval=13, min_whole_interval=0, max_whole_interval=inf,
+            pseudo_projection=True, n_jobs=2)
+        assert gisp.mine(Gisp.transform(SEQUENCES)) == Gisp(
+            itemize=itemize, min_support=2, min_interval=0,
+            max_interval=13, min_whole_interval=0, max_whole_interval=inf,
+        ).mine(isdb)
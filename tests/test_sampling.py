@@ -0,0 +1,67 @@
+from math import inf, log2
+
+import pytest
+
+from gisp.gisp import Gisp
+from gisp.sampling import bounds, count, mine, sample, sample_support
+
+from .conftest import MORE_SEQUENCES as SEQUENCES
+
+
+def gisp(**options):
+    return Gisp(
+        itemize=lambda t: int(log2(t+1)), min_support=3, min_interval=0,
+        max_interval=13, min_whole_interval=0, max_whole_interval=inf,
+        **options)
+
+
+class TestSampling:
+
+    def test_sample(self) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        sampled = sample(isdb, 0.5, seed=0)
+        assert sampled.n_sequences == 4
+        assert sample(isdb, 0.5, seed=0).sid.tolist() == sampled.sid.tolist()
+        assert set(sampled.sid.tolist()) <= set(isdb.sid.tolist())
+
+    def test_bounds(self) -> None:
+        assert bounds(50, 1000, 100, 0.95) == (500, 403, 597)
+        # supports are within those possible given the sample
+        assert bounds(0, 1000, 100, 0.95) == (0, 0, 37)
+        assert bounds(100, 1000, 100, 0.95) == (1000, 963, 1000)
+        assert sample_support(500, 1000, 100, 0.95) == 41
+
+    def test_count(self) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        for options in [{}, {'pseudo_projection': True}]:
+            patterns = gisp(**options).mine(isdb)
+            missing = [[(0, 'f'), (0, 'e')], [(0, 'g')], [(0, 'a'), (9, 'c')]]
+            assert count(
+                gisp(**options), isdb,
+                [pattern.sequence for pattern in patterns] + missing
+            ) == [pattern.support for pattern in patterns] + [0, 0, 0]
+
+    def test_mine(self) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        patterns = gisp().mine(isdb)
+        # the whole ISDB as the sample gives exact supports
+        for verify in [False, True]:
+            estimates = mine(gisp(), isdb, 1.0, verify=verify)
+            assert [(estimate.sequence, estimate.support, estimate.lower,
+                     estimate.upper) for estimate in estimates] == [
+                (pattern.sequence, pattern.support, pattern.support,
+                 pattern.support) for pattern in patterns]
+        # verified supports of a sample are exact
+        estimates = mine(gisp(), isdb, 0.5, verify=True, seed=0)
+        supports = {str(pattern.sequence): pattern.support
+                    for pattern in patterns}
+        assert all(
+            estimate.lower == estimate.support == estimate.upper
+            == supports[str(estimate.sequence)] for estimate in estimates)
+
+    def test_unsupported(self) -> None:
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        with pytest.raises(ValueError):
+            mine(gisp(closed=True), isdb, 0.5)
+        with pytest.raises(ValueError):
+            mine(gisp(), isdb, 0)
@@ -0,0 +1,50 @@
+from math import inf, log2
+
+from gisp.gisp import Gisp
+from gisp.stats import Stats
+
+from .conftest import SEQUENCES
+
+
+class TestStats:
+
+    def test_mine(self) -> None:
+        for encode, pseudo_projection in [
+                (False, False), (True, False), (True, True)]:
+            prefixes = []
+            stats = Stats(
+                callback=lambda prefix, rows, seconds: prefixes.append(prefix))
+            gisp = Gisp(
+                itemize=lambda t: int(log2(t+1)), min_support=2,
+                min_interval=0, max_interval=inf, min_whole_interval=0,
+                max_whole_interval=inf, pseudo_projection=pseudo_projection)
+            gisp.mine(Gisp.transform(SEQUENCES, encode=encode), stats)
+
+            summary = stats.summary()
+            assert [(level['level'], level['projections'], level['rows'],
+                     level['max_rows']) for level in summary['levels']] == [
+                (0, 0, 0, 0), (1, 5, 48, 27), (2, 9, 30, 7), (3, 5, 9, 5),
+                (4, 1, 1, 1)]
+            assert summary['peak_bytes'] > 0
+            assert summary['count_seconds'] > 0
+            assert [(0, 'a'), (2, 'a'), (0, 'b')] in prefixes
+            # every PDB is released in the end
+            assert stats._live_bytes == 0
+
+    def test_merge(self) -> None:
+        stats, other = Stats(), Stats()
+        stats.enter(1, 10, 100)
+        stats.add_time(1, 'count', 1.0)
+        other.enter(1, 30, 200)
+        other.enter(2, 5, 50)
+        other.add_time(1, 'count', 2.0)
+        stats.merge(other)
+        assert stats.summary()['levels'] == [
+            {'level': 1, 'projections': 2, 'rows': 40, 'max_rows': 30,
+             'peak_bytes': 200, 'project_seconds': 0.0,
+             'itemize_seconds': 0.0, 'count_seconds': 3.0},
+            {'level': 2, 'projections': 1, 'rows': 5, 'max_rows': 5,
+             'peak_bytes': 50, 'project_seconds': 0.0,
+             'itemize_seconds': 0.0, 'count_seconds': 0.0},
+        ]
+        assert stats.peak_bytes == 250
@@ -0,0 +1,56 @@
+from math import inf, log2
+
+import pytest
+
+from gisp.gisp import Gisp, Pattern
+from gisp.store import PatternStore
+
+from .conftest import SEQUENCES
+
+
+class TestPatternStore:
+
+    def test_from_patterns(self) -> None:
+        gisp = Gisp(
+            itemize=lambda t: int(log2(t+1)), min_support=2, min_interval=0,
+            max_interval=inf, min_whole_interval=0, max_whole_interval=inf)
+        isdb = Gisp.transform(SEQUENCES, encode=True)
+        patterns = gisp.mine(isdb)
+        store = PatternStore.from_patterns(gisp.iter_patterns(isdb))
+        assert len(store) == len(patterns)
+        assert list(store) == patterns
+        assert store[3] == patterns[3]
+        # patterns in depth-first order add one node each
+        assert len(store.parent) == len(patterns)
+
+    def test_append(self) -> None:
+        store = PatternStore()
+        store.append(Pattern([(0, 'a'), (1, 'b'), (2, 'c')], 2))
+        store.append(Pattern([(0, 'a'), (1, 'b')], 3))
+        store.append(Pattern([(0, 'a'), (1, 'c')], 4))
+        assert store.parent.tolist() == [-1, 0, 1, 0, 0]
+        assert store.item.tolist() == [0, 1, 2, 1, 2]
+        assert store.interval.tolist() == [0, 1, 2, 1, 1]
+        assert store.support.tolist() == [-1, -1, 2, 3, 4]
+        assert store.to_patterns() == [
+            Pattern([(0, 'a'), (1, 'b'), (2, 'c')], 2),
+            Pattern([(0, 'a'), (1, 'b')], 3),
+            Pattern([(0, 'a'), (1, 'c')], 4),
+        ]
+
+    def test_frame(self) -> None:
+        store = PatternStore.from_patterns([
+            Pattern([(0, 'b')], 3),
+            Pattern([(0, 'b'), (2, 'a')], 2),
+            Pattern([(0, 'c')], 2),
+        ])
+        frame = store.to_frame()
+        assert frame['parent'].tolist() == [-1, 0, -1]
+        assert frame['item'].tolist() == ['b', 'a', 'c']
+        assert list(frame['item'].cat.categories) == ['b', 'a', 'c']
+        assert list(PatternStore.from_frame(frame)) == list(store)
+
+    def test_arrow(self) -> None:
+        pytest.importorskip('pyarrow')
+        store = PatternStore.from_patterns([Pattern([(0, 'b'), (2, 'a')], 2)])
+        assert list(PatternStore.from_arrow(store.to_arrow())) == list(store)
@@ -0,0 +1,34 @@
+import pytest
+
+from benchmarks.synthetic import INTERVALS, generate
+
+
+class TestSynthetic:
+
+    def test_generate_seeded(self) -> None:
+        assert generate(50, seed=1) == generate(50, seed=1)
+        assert generate(50, seed=1) != generate(50, seed=2)
+
+    def test_generate_sizes(self) -> None:
+        sequences = generate(2000, length=5, itemset_size=2, n_items=10)
+        assert len(sequences) == 2000
+        lengths = [len(sequence) for sequence in sequences]
+        assert min(lengths) >= 1
+        assert 4.8 < sum(lengths) / len(lengths) < 5.2
+        labels = {f'i{k}' for k in range(10)}
+        for sequence in sequences:
+            for _, items in sequence:
+                assert items and items == sorted(set(items))
+                assert set(items) <= labels
+
+    def test_generate_intervals(self) -> None:
+        for interval in INTERVALS:
+            for sequence in generate(100, interval=interval, scale=60):
+                intervals = [t for t, _ in sequence]
+                # the first itemset is at 0, and intervals never decrease
+                assert intervals[0] == 0
+                assert intervals == sorted(intervals)
+                if interval == 'constant':
+                    assert intervals == list(range(0, 60 * len(sequence), 60))
+        with pytest.raises(ValueError):
+            generate(10, interval='normal')